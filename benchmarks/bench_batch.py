@@ -0,0 +1,116 @@
+'''Throughput of batch searches (search_many) with pooled engine instances.
+
+The HTTP requests are answered by the fixture pages. Each engine instance is
+reused for query after query, so the benchmark also checks that every query
+requests the same result pages as the first one: pagination state of a
+previous search must not leak into the next.
+
+Usage: python benchmarks/bench_batch.py [-q QUERIES] [-p PAGES] [-c CONCURRENCY]
+       [-e ENGINES] [-r RESULTS]
+'''
+import argparse
+import json
+import os
+import sys
+import threading
+from urllib.parse import urlparse
+from timeit import default_timer as timer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from search_engines.engines import search_engines_dict
+from search_engines.engine import SearchEngine
+from search_engines.batch import search_many, COMPLETED
+from search_engines import output as out
+import fixtures
+
+
+class Response(object):
+    '''The parts of a requests.Response the HTTP client reads.'''
+    def __init__(self, html):
+        self.status_code = 200
+        self.text = html
+        self.content = html.encode('utf-8')
+        self.raw = None
+
+
+class Server(object):
+    '''Answers each result page request with the fixture page of its number,
+    and records the result page requests of every search.
+    '''
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = {}
+        '''The result page requests by (engine name, query), with the query replaced by "Q".'''
+        self._hosts = {urlparse(search_engines_dict[name]()._base_url).netloc: name for name in pages}
+        self._thread = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        '''Routes the HTTP requests and the result page requests of the engines to the server.'''
+        request_page = SearchEngine._request_page
+        def _request_page(engine, request):
+            self.record(engine, request)
+            return request_page(engine, request)
+        SearchEngine._request_page = _request_page
+        requests.Session.request = lambda session, *args, **kwargs: self.request(*args, **kwargs)
+
+    def record(self, engine, request):
+        name = engine.__class__.__name__.lower()
+        made = json.dumps([request['url'], request['data']], sort_keys=True).replace(engine._query, 'Q')
+        with self._lock:
+            searched = self.requests.setdefault((name, engine._query), [])
+            searched.append(made)
+        self._thread.name, self._thread.page = name, len(searched)
+
+    def request(self, method, url, **kwargs):
+        name = self._hosts.get(urlparse(url).netloc, getattr(self._thread, 'name', None))
+        pages = self.pages[name]
+        return Response(pages[(getattr(self._thread, 'page', 1) - 1) % len(pages)])
+
+
+def measure(name, queries, pages, concurrency):
+    '''Returns the searches per second and the results per search.'''
+    count, start = 0, timer()
+    searches = search_many(
+        queries, [name], concurrency, pages, rate_limits={name: (10000, 100)}
+    )
+    for query, _, results, status in searches:
+        assert status == COMPLETED, '{} search of "{}" is {}'.format(name, query, status)
+        count += len(results)
+    return len(queries) / (timer() - start), count / len(queries)
+
+def check(server, name, queries):
+    '''Checks that every query requested the same result pages as the first one.'''
+    first = server.requests[(name, queries[0])]
+    for query in queries[1:]:
+        made = server.requests[(name, query)]
+        assert made == first, '{} requests of "{}" differ: {} != {}'.format(name, query, made, first)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-q', help='queries (default: 20)', default=20, type=int)
+    ap.add_argument('-p', help='pages per search (default: 3)', default=3, type=int)
+    ap.add_argument('-c', help='concurrent searches (default: 4)', default=4, type=int)
+    ap.add_argument('-e', help='engines, comma separated (default: all)', default='all')
+    ap.add_argument('-r', help='results per page (default: 10)', default=10, type=int)
+    args = ap.parse_args()
+
+    out.console = lambda msg, end='\n', level=None: None
+    names = sorted(fixtures.pages) if args.e == 'all' else [e.strip().lower() for e in args.e.split(',')]
+    server = Server({
+        name: [fixtures.pages[name](page, args.r) for page in range(1, args.p + 1)] for name in names
+    })
+    server.install()
+    queries = ['query{:04d}'.format(i) for i in range(args.q)]
+
+    print('{:<12}{:>12}{:>16}'.format('engine', 'searches/s', 'results/search'))
+    for name in names:
+        rate, results = measure(name, queries, args.p, args.c)
+        check(server, name, queries)
+        print('{:<12}{:>12.1f}{:>16.1f}'.format(name, rate, results))
+
+if __name__ == '__main__':
+    main()
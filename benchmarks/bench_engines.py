@@ -0,0 +1,122 @@
+'''Benchmark of each engine's page pipeline: _is_ok, parse, _filter_results,
+_collect_results and _next_page, over the synthetic fixtures or recorded archives.
+
+Reports pages and results per second, the peak traced memory of a page and the
+memory blocks a page leaves allocated (mostly its parse tree), for each parser backend.
+
+Usage: python benchmarks/bench_engines.py [-n ROUNDS] [-p PAGES] [-r RESULTS]
+       [-e ENGINES] [-parser BACKENDS] [-archive FILE]
+'''
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from urllib.parse import urlparse
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from search_engines.engines import search_engines_dict
+from search_engines.recording import read_archive
+from search_engines.results import SearchResults
+from search_engines import parsers
+from search_engines import output as out
+import fixtures
+
+
+def fixture_pages(name, pages, results):
+    '''Returns the HTML of the fixture pages of an engine.'''
+    return [fixtures.pages[name](page, results) for page in range(1, pages + 1)]
+
+def archive_pages(path):
+    '''Returns the HTML of the recorded pages (see HttpClient.record), by engine name.'''
+    hosts = {urlparse(engine()._base_url).netloc: name for name, engine in search_engines_dict.items()}
+    pages = {}
+    for exchange in read_archive(path):
+        name = hosts.get(urlparse(exchange['url']).netloc.lower())
+        if name and exchange['status'] == 200:
+            pages.setdefault(name, []).append(exchange['body'])
+    return pages
+
+def run(engine, pages):
+    '''Runs the pipeline over the pages; returns the number of collected results.'''
+    engine.results = SearchResults()
+    for html in pages:
+        response = engine._http_client.response(200, html)
+        if not engine._is_ok(response):
+            continue
+        tags = engine._document(response)
+        engine._collect_results(engine._filter_results(tags))
+        engine._next_page(tags)
+    return len(engine.results)
+
+def measure_time(name, pages, backend, rounds):
+    '''Returns the pages and results per second.'''
+    count, start = 0, timer()
+    for _ in range(rounds):
+        engine = search_engines_dict[name]()
+        engine.parser = backend
+        engine._query = u'example'
+        count += run(engine, pages)
+    elapsed = timer() - start
+    return len(pages) * rounds / elapsed, count / elapsed
+
+def measure_memory(name, pages, backend):
+    '''Returns the highest peak KiB of a page and the blocks a page leaves allocated.'''
+    engine = search_engines_dict[name]()
+    engine.parser = backend
+    engine._query = u'example'
+    responses, peak = [], 0
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for html in pages:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            responses.append(engine._http_client.response(200, html))
+            engine._is_ok(responses[-1])
+            tags = engine._document(responses[-1])
+            engine._collect_results(engine._filter_results(tags))
+            engine._next_page(tags)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    return peak / 1024.0, blocks / len(pages)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='rounds per engine (default: 20)', default=20, type=int)
+    ap.add_argument('-p', help='fixture pages per round (default: 5)', default=5, type=int)
+    ap.add_argument('-r', help='results per fixture page (default: 10)', default=10, type=int)
+    ap.add_argument('-e', help='engines, comma separated (default: all)', default='all')
+    ap.add_argument('-parser', help='parser backends, comma separated (default: all installed)', default='all')
+    ap.add_argument('-archive', help='a recorded archive to use instead of the fixtures')
+    args = ap.parse_args()
+
+    out.console = lambda msg, end='\n', level=None: None
+    backends = parsers.available_parsers() if args.parser == 'all' else args.parser.split(',')
+    if args.archive:
+        pages = archive_pages(args.archive)
+    else:
+        pages = {name: fixture_pages(name, args.p, args.r) for name in fixtures.pages}
+    names = sorted(pages) if args.e == 'all' else [e.strip().lower() for e in args.e.split(',')]
+
+    print('{:<12}{:<13}{:>10}{:>12}{:>12}{:>12}'.format(
+        'engine', 'parser', 'pages/s', 'results/s', 'peak KiB/pg', 'blocks/pg'
+    ))
+    for name in names:
+        if not pages.get(name):
+            print('{:<12}no pages'.format(name))
+            continue
+        for backend in backends:
+            page_rate, result_rate = measure_time(name, pages[name], backend, args.n)
+            peak, blocks = measure_memory(name, pages[name], backend)
+            print('{:<12}{:<13}{:>10.1f}{:>12.1f}{:>12.1f}{:>12.0f}'.format(
+                name, backend, page_rate, result_rate, peak, blocks
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+'''Micro-benchmark of the per-page extraction step (_filter_results).
+
+Compares the precompiled extraction plans with the previous extraction path,
+where each field ran its own select_one with freshly built selectors and 
+_item decoded the URL twice. Also checks that every installed parser backend
+extracts the same items.
+
+Usage: python benchmarks/bench_extraction.py [-n ROUNDS] [-r RESULTS] [-parser BACKEND]
+'''
+import argparse
+import os
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from search_engines.engines import search_engines_dict
+from search_engines import utils
+from search_engines import parsers
+import fixtures
+
+
+def legacy(engine):
+    '''Switches an engine instance back to the per-field selector lookups.'''
+    engine._select_field = lambda tag, field: tag.select_one(engine._selectors(field))
+    engine._item = lambda link: {
+        'host': utils.domain(engine._get_url(link)), 
+        'link': engine._get_url(link), 
+        'title': engine._get_title(link).strip(), 
+        'text': engine._get_text(link).strip()
+    }
+    return engine
+
+def measure(engine, doc, rounds):
+    '''Returns the seconds per page and the extracted items.'''
+    start = timer()
+    for _ in range(rounds):
+        items = engine._filter_results(doc)
+    return (timer() - start) / rounds, items
+
+def check_backends(name, html):
+    '''Checks that the installed parser backends extract the same items from a page.'''
+    extracted = {}
+    for backend in parsers.available_parsers():
+        engine = search_engines_dict[name]()
+        engine.parser = backend
+        extracted[backend] = engine._filter_results(engine._parse(html))
+    for backend, items in extracted.items():
+        assert items == extracted[parsers.HTML_PARSER], \
+            '{} items differ between {} and {}'.format(name, backend, parsers.HTML_PARSER)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='rounds per engine (default: 200)', default=200, type=int)
+    ap.add_argument('-r', help='results per page (default: 10)', default=10, type=int)
+    ap.add_argument('-parser', help='HTML parser backend (default: html.parser)', default='html.parser')
+    args = ap.parse_args()
+
+    print('{:<12}{:>14}{:>14}{:>10}'.format('engine', 'legacy ms/pg', 'plan ms/pg', 'speedup'))
+    for name, page in sorted(fixtures.pages.items()):
+        engine = search_engines_dict[name]()
+        engine.parser = args.parser
+        doc = engine._parse(page(1, args.r))
+        check_backends(name, page(1, args.r))
+
+        plan_time, plan_items = measure(engine, doc, args.n)
+        legacy_time, legacy_items = measure(legacy(search_engines_dict[name]()), doc, args.n)
+        assert plan_items == legacy_items, 'extracted items differ for ' + name
+
+        print('{:<12}{:>14.3f}{:>14.3f}{:>9.1f}x'.format(
+            name, legacy_time * 1000, plan_time * 1000, legacy_time / plan_time
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+'''Throughput of searches that parse their result pages in the search threads
+and in a ParseExecutor.
+
+Each thread runs whole searches (`search()`) with the HTTP requests answered by
+the fixture pages and the rate limit and delays turned off, like concurrent
+searches of a batch. In the threads the GIL caps parsing at about one core; the
+executor spreads it over worker processes. The offloaded column counts the
+pages the executor parsed, so engines that keep parsing in the search threads
+show up.
+
+Usage: python benchmarks/bench_parse_executor.py [-n PAGES] [-s SEARCHES]
+       [-t THREADS] [-w WORKERS] [-e ENGINE] [-r RESULTS]
+'''
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer as timer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from search_engines.engines import search_engines_dict
+from search_engines.executor import ParseExecutor
+import fixtures
+
+
+class Response(object):
+    '''The parts of a requests.Response the HTTP client reads.'''
+    def __init__(self, html):
+        self.status_code = 200
+        self.text = html
+        self.content = html.encode('utf-8')
+        self.raw = None
+
+
+class Server(object):
+    '''Answers the requests of each search thread with the next fixture page,
+    from the first one again after the last.'''
+    def __init__(self, pages):
+        self.pages = pages
+        self._thread = threading.local()
+
+    def start(self):
+        self._thread.page = 0
+
+    def request(self, method, url, **kwargs):
+        page = self._thread.page
+        self._thread.page += 1
+        return Response(self.pages[page % len(self.pages)])
+
+
+class CountingExecutor(ParseExecutor):
+    '''A ParseExecutor that counts the pages it parses.'''
+    def __init__(self, max_workers=None):
+        super(CountingExecutor, self).__init__(max_workers)
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def parse(self, engine, html):
+        with self._lock:
+            self.pages += 1
+        return super(CountingExecutor, self).parse(engine, html)
+
+
+def search(name, pages, server, executor):
+    '''Runs a search of up to `pages` pages; returns the number of collected results.'''
+    server.start()
+    engine = search_engines_dict[name]()
+    engine.disable_console()
+    engine.set_rate_limit(0)
+    engine._delay = (0, 0)
+    engine.parse_executor = executor
+    return len(engine.search(u'example', pages))
+
+def measure(name, pages, results, server, threads, searches, executor):
+    '''Returns the result pages per second of `searches` searches, `threads` at a time.'''
+    start = timer()
+    with ThreadPoolExecutor(threads) as pool:
+        collected = sum(pool.map(lambda _: search(name, pages, server, executor), range(searches)))
+    return collected / results / (timer() - start)
+
+def main():
+    cpus = os.cpu_count() or 1
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='pages per search (default: 5)', default=5, type=int)
+    ap.add_argument('-s', help='searches (default: 64)', default=64, type=int)
+    ap.add_argument('-t', help='search threads (default: 16)', default=16, type=int)
+    ap.add_argument('-w', help='worker processes, comma-separated (default: 1,2,4..CPUs)')
+    ap.add_argument('-e', help='engine (default: google)', default='google')
+    ap.add_argument('-r', help='results per page (default: 10)', default=10, type=int)
+    args = ap.parse_args()
+
+    workers = [int(w) for w in args.w.split(',')] if args.w else sorted(
+        set([1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus] + [cpus])
+    )
+    server = Server([fixtures.pages[args.e](page, args.r) for page in range(1, args.n + 1)])
+    requests.Session.request = lambda session, *args, **kwargs: server.request(*args, **kwargs)
+
+    print('{} CPUs, {} searches of {} pages, {} threads'.format(cpus, args.s, args.n, args.t))
+    print('{:<16}{:>12}{:>10}{:>12}'.format('parsing', 'pages/s', 'speedup', 'offloaded'))
+    base = measure(args.e, args.n, args.r, server, args.t, args.s, None)
+    print('{:<16}{:>12.1f}{:>10.2f}{:>12}'.format('threads', base, 1, 0))
+    for count in workers:
+        with CountingExecutor(count) as executor:
+            search(args.e, 1, server, executor)
+            executor.pages = 0
+            rate = measure(args.e, args.n, args.r, server, args.t, args.s, executor)
+        print('{:<16}{:>12.1f}{:>10.2f}{:>12}'.format(
+            '{} processes'.format(count), rate, rate / base, executor.pages
+        ))
+
+if __name__ == '__main__':
+    main()
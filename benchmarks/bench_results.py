@@ -0,0 +1,87 @@
+'''Memory footprint and speed of SearchResults.
+
+Compares the columnar storage with the previous one (a dict per result, a list
+per column call and a frozenset key per result for duplicate checks).
+
+Usage: python benchmarks/bench_results.py [-n RESULTS] [-hosts HOSTS]
+'''
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from search_engines.results import SearchResults
+
+
+class LegacyResults(object):
+    '''The previous SearchResults storage.'''
+    def __init__(self):
+        self._results = []
+        self._links = set()
+        self._hosts = set()
+        self._items = set()
+
+    def links(self):
+        return [row.get('link') for row in self._results]
+
+    def __contains__(self, item):
+        return frozenset(item.items()) in self._items
+
+    def append(self, item):
+        self._results.append(item)
+        self._links.add(item.get('link'))
+        self._hosts.add(item.get('host'))
+        self._items.add(frozenset(item.items()))
+
+
+def items(count, hosts):
+    '''Yields result items the way engines build them, with a fresh host string each.'''
+    for i in range(count):
+        host = 'www.example-company-{}.com'.format(i % hosts)
+        yield {
+            'host': host,
+            'link': 'https://{}/about/team?id={}'.format(host, i),
+            'title': 'Example company {} - official site'.format(i),
+            'text': 'Company {} makes widgets, gadgets and other things. Contact, about us and careers.'.format(i)
+        }
+
+def measure(cls, count, hosts):
+    '''Returns the MiB kept by the results, the seconds to collect them and to read the links 10 times.'''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = timer()
+        results = cls()
+        for item in items(count, hosts):
+            if item not in results:
+                results.append(item)
+        collect = timer() - start
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    start = timer()
+    for _ in range(10):
+        links = results.links()
+        len(links)
+    return size / 1024.0 / 1024, collect, timer() - start
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='number of results (default: 100000)', default=100000, type=int)
+    ap.add_argument('-hosts', help='number of distinct hosts (default: 1000)', default=1000, type=int)
+    args = ap.parse_args()
+
+    print('{:<10}{:>14}{:>14}{:>14}{:>14}'.format('storage', 'MiB', 'MiB/100k', 'collect s', 'links() s'))
+    for name, cls in (('legacy', LegacyResults), ('columnar', SearchResults)):
+        size, collect, links = measure(cls, args.n, args.hosts)
+        print('{:<10}{:>14.1f}{:>14.1f}{:>14.3f}{:>14.4f}'.format(
+            name, size, size * 100000.0 / args.n, collect, links
+        ))
+
+if __name__ == '__main__':
+    main()
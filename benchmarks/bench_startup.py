@@ -0,0 +1,47 @@
+'''Startup time of the package and the CLI.
+
+Runs each command in a fresh interpreter, like short-lived worker processes do,
+and reports the fastest and the median wall time.
+
+Usage: python benchmarks/bench_startup.py [-n RUNS]
+'''
+import argparse
+import os
+import subprocess
+import sys
+from timeit import default_timer as timer
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+COMMANDS = (
+    ('python (baseline)', ['-c', 'pass']),
+    ('import search_engines', ['-c', 'import search_engines']),
+    ('import + Google()', ['-c', 'import search_engines; search_engines.Google()']),
+    ('import all engines', ['-c', 'from search_engines.engines import *']),
+    ('search_engines_cli.py -h', [os.path.join(ROOT, 'search_engines_cli.py'), '-h']),
+)
+
+
+def measure(args, runs):
+    '''Returns the wall time of each run of the interpreter with `args`.'''
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(ROOT))
+    times = []
+    for _ in range(runs):
+        start = timer()
+        subprocess.check_call([sys.executable] + args, env=env, stdout=subprocess.DEVNULL)
+        times.append(timer() - start)
+    return sorted(times)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='runs per command (default: 20)', default=20, type=int)
+    args = ap.parse_args()
+
+    print('{:<28}{:>12}{:>12}'.format('command', 'min ms', 'median ms'))
+    for name, command in COMMANDS:
+        times = measure(command, args.n)
+        print('{:<28}{:>12.1f}{:>12.1f}'.format(name, times[0] * 1000, times[len(times) // 2] * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+'''Synthetic result pages for the benchmarks.
+Each page follows the markup the engine's selectors expect, padded with the
+kind of nested wrappers, icons and inline scripts real result pages carry.
+'''
+import json
+import base64
+from urllib.parse import quote
+
+
+def _noise(i):
+    '''Markup that surrounds result items on real pages.'''
+    return (
+        u'<div class="kp-wrap"><span class="ic"><svg viewBox="0 0 24 24"><path d="M0 0h24v24H0z"/></svg></span>'
+        u'<div class="meta"><span>{0} days ago</span><span class="sep">&middot;</span>'
+        u'<span class="tags"><a href="#t{0}">tag {0}</a><a href="#u{0}">tag {1}</a></span></div></div>'
+    ).format(i, i + 1)
+
+def _result_url(page, i):
+    return u'https://www.example-{}-{}.com/company/about?ref=serp&id={}'.format(page, i, i * 7)
+
+def google(page=1, results=10):
+    items = u''.join(
+        u'<div class="g"><div class="tF2Cxc"><a href="/url?q={url}&amp;sa=U&amp;ved=2ah{i}">'
+        u'<h3 class="LC20lb">Example company {i} - official site</h3><cite>example-{i}.com</cite></a>'
+        u'{noise}<div class="VwiC3b"><span>Example</span><span>&rsaquo;</span><span>Company {i} makes widgets, gadgets '
+        u'and other things since 19{i:02d}.</span><span>Contact, about us and careers.</span></div></div></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results - 1)
+    )
+    # an item without wrappers: the text selector ('div') matches only the item itself,
+    # which BeautifulSoup's select doesn't return, so its text is empty with every backend
+    items += (
+        u'<div class="g"><a href="/url?q={url}&amp;sa=U&amp;ved=2ah{i}"><h3 class="LC20lb">Example company {i}'
+        u'</h3><cite>example-{i}.com</cite></a><span>Company {i} makes widgets</span></div>'
+    ).format(url=_result_url(page, results - 1), i=results - 1) if results else u''
+    return (
+        u'<html><head><script>var a = 1;</script></head><body><div id="main">{}</div>'
+        u'<footer><a href="/search?q=example&amp;start={}" aria-label="Next page">Next</a></footer></body></html>'
+    ).format(items, page * 10)
+
+def bing(page=1, results=10):
+    def url(i):
+        encoded = base64.b64encode(_result_url(page, i).encode('utf-8')).decode('ascii').rstrip('=')
+        return u'https://www.bing.com/ck/a?!&amp;&amp;p=abc&amp;u=a1{}&amp;ntb=1'.format(encoded)
+    items = u''.join(
+        u'<li class="b_algo"><div class="b_tpcn">{noise}</div><h2><a href="{url}">Example company {i} '
+        u'<strong>official</strong> site</a></h2><div class="b_caption"><p>Company {i} makes widgets, '
+        u'gadgets and other things since 19{i:02d}. Contact, about us and careers.</p></div></li>'
+        .format(noise=_noise(i), url=url(i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div id="b_content"><ol id="b_results">{}</ol>'
+        u'<nav role="navigation"><a class="sb_pagN" href="/search?q=example&amp;first={}">Next</a></nav>'
+        u'</div></body></html>'
+    ).format(items, page * 10 + 1)
+
+def duckduckgo(page=1, results=10):
+    items = u''.join(
+        u'<div class="result results_links web-result"><div class="links_main result__body">{noise}'
+        u'<h2 class="result__title"><a class="result__a" href="{url}">Example company {i} official site</a></h2>'
+        u'<a class="result__snippet" href="{url}">Company {i} makes widgets, gadgets and other things since '
+        u'19{i:02d}.</a></div></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div id="links" class="results">{}</div>'
+        u'<form action="/html/" method="post"><input type="submit" value="next"></form></body></html>'
+    ).format(items)
+
+def yahoo(page=1, results=10):
+    def url(i):
+        return u'https://r.search.yahoo.com/_ylt=AwrE{0}/RV=2/RE=17/RO=10/RU={1}/RK=2/RS=xq{0}-'.format(
+            i, quote(_result_url(page, i), safe='')
+        )
+    items = u''.join(
+        u'<li><div class="dd algo algo-sr Sr"><div class="compTitle options-toggle">'
+        u'<h3 class="title"><span class="d-ib">example-{i}.com</span><a href="{url}">Example company {i} '
+        u'official site</a></h3></div>{noise}<div class="compText aAbs"><p>Company {i} makes widgets, gadgets '
+        u'and other things since 19{i:02d}.</p></div></div></li>'
+        .format(noise=_noise(i), url=url(i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div id="web"><ol class="searchCenterMiddle">{}</ol></div>'
+        u'<div class="compPagination"><a class="next" href="/search?p=example&amp;b={}">Next</a></div>'
+        u'</body></html>'
+    ).format(items, page * 10 + 1)
+
+def startpage(page=1, results=10):
+    items = u''.join(
+        u'<div class="w-gl__result">{noise}<a class="w-gl__result-title" href="{url}">'
+        u'<h3>Example company {i} official site</h3></a><a class="w-gl__result-url" href="{url}">{url}</a>'
+        u'<p class="w-gl__description">Company {i} makes widgets, gadgets and other things since '
+        u'19{i:02d}.</p></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    form = (
+        u'<form class="pagination__form" action="/sp/search" method="post">'
+        u'<input type="hidden" name="query" value="example"><input type="hidden" name="page" value="{}">'
+        u'<input type="hidden" name="sc" value="Xyz{}"><button type="submit">{}</button></form>'
+    )
+    return (
+        u'<html><body><section class="w-gl w-gl--default">{}</section><div class="pagination">{}{}</div>'
+        u'</body></html>'
+    ).format(items, form.format(page - 1, page, 'Previous'), form.format(page + 1, page, 'Next'))
+
+def dogpile(page=1, results=10):
+    items = u''.join(
+        u'<div class="web-google__result">{noise}<a class="web-google__title" href="{url}">Example company '
+        u'{i} official site</a><span class="web-google__url">example-{i}.com</span>'
+        u'<span class="web-google__description">Company {i} makes widgets, gadgets and other things since '
+        u'19{i:02d}.</span></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div class="mainline"><div class="web-google">{}</div></div>'
+        u'<div class="pagination"><a class="pagination__num pagination__num--next" '
+        u'href="/serp?q=example&amp;page={}">Next</a></div></body></html>'
+    ).format(items, page + 1)
+
+def ask(page=1, results=10):
+    items = u''.join(
+        u'<div class="PartialSearchResults-item">{noise}<div class="PartialSearchResults-item-title">'
+        u'<a class="PartialSearchResults-item-title-link result-link" href="{url}">Example company {i} '
+        u'official site</a></div><p class="PartialSearchResults-item-url">example-{i}.com</p>'
+        u'<p class="PartialSearchResults-item-abstract">Company {i} makes widgets, gadgets and other things '
+        u'since 19{i:02d}.</p></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div class="PartialSearchResults-body">{}</div><ul class="PartialWebPagination">'
+        u'<li class="PartialWebPagination-next"><a href="/web?q=example&amp;page={}">Next</a></li></ul>'
+        u'</body></html>'
+    ).format(items, page + 1)
+
+def mojeek(page=1, results=10):
+    items = u''.join(
+        u'<li>{noise}<a class="ob" href="{url}">Example company {i} official site</a>'
+        u'<p class="i">example-{i}.com</p><p class="s">Company {i} makes widgets, gadgets and other things '
+        u'since 19{i:02d}.</p></li>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div class="results"><ul class="results-standard">{}</ul></div>'
+        u'<div class="pagination"><ul><li><a href="/search?q=example&amp;s={}">{}</a></li>'
+        u'<li><a href="/search?q=example&amp;s={}">Next</a></li></ul></div></body></html>'
+    ).format(items, page * 10 + 1, page + 1, page * 10 + 1)
+
+def qwant(page=1, results=10):
+    def item(i):
+        return {
+            'url': _result_url(page, i), 'title': u'Example company {} official site'.format(i),
+            'desc': u'Company {0} makes widgets, gadgets and other things since 19{0:02d}.'.format(i),
+            'source': u'example-{}.com'.format(i), 'favicon': u'https://s.qwant.com/fav/{}.ico'.format(i)
+        }
+    mainline = [
+        {'type': 'ads', 'items': [item(99)]},
+        {'type': 'web', 'items': [item(i) for i in range(results)]}
+    ]
+    return json.dumps({'status': 'success', 'data': {'result': {'items': {'mainline': mainline}}}})
+
+def brave(page=1, results=10):
+    items = u''.join(
+        u'<div class="snippet fdb" data-loc="main" data-type="web">{noise}<a class="result-header" href="{url}">'
+        u'<span class="snippet-url">example-{i}.com</span><span class="snippet-title">Example company {i} '
+        u'official site</span></a><div class="snippet-content"><p class="snippet-description">Company {i} '
+        u'makes widgets, gadgets and other things since 19{i:02d}.</p></div></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div id="results">{}</div><div id="pagination">'
+        u'<a class="btn disabled" href="/search?q=example&amp;offset={}">Previous</a>'
+        u'<a class="btn" href="/search?q=example&amp;offset={}">Next</a></div></body></html>'
+    ).format(items, page - 2, page)
+
+def torch(page=1, results=10):
+    items = u''.join(
+        u'<div class="result mb-3">{noise}<h5><a href="{url}">Example company {i} official site</a></h5>'
+        u'<small>{url}</small><p>Company {i} makes widgets, gadgets and other things since 19{i:02d}.</p></div>'
+        .format(noise=_noise(i), url=_result_url(page, i), i=i)
+        for i in range(results)
+    )
+    return (
+        u'<html><body><div class="container">{}</div><ul class="pagination">'
+        u'<li><a class="page-link" href="/search?query=example&amp;page={}">Next</a></li></ul></body></html>'
+    ).format(items, page + 1)
+
+
+pages = {
+    'google': google,
+    'bing': bing,
+    'yahoo': yahoo,
+    'aol': yahoo,
+    'duckduckgo': duckduckgo,
+    'startpage': startpage,
+    'dogpile': dogpile,
+    'ask': ask,
+    'mojeek': mojeek,
+    'qwant': qwant,
+    'brave': brave,
+    'torch': torch,
+}
+'''Page generators by engine name.'''
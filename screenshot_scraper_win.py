@@ -1,7 +1,8 @@
 import pandas as pd
 import os
 import healing_agent
-from search_engines import Google, Bing, Yahoo, Aol, Duckduckgo, Startpage
+from search_engines import search_engines_dict
+from search_engines.urls import host, parse, registrable_domain, site_root
 import openpyxl
 from playwright.sync_api import sync_playwright
 import re
@@ -20,6 +21,7 @@ logger.add("scraper.log", format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {messag
 browser = None
 context = None
 playwright = None
+search_engines = None
 
 
 class ScraperApp:
@@ -183,9 +185,42 @@ def cleanup_browser():
         playwright = None
 
 
+def is_blacklisted(url, blacklist):
+    """
+    Check if a URL belongs to a blacklisted site.
+    The host (with and without "www.") and its registrable domain are compared,
+    so "www.opten.hu" and "m.opten.hu" match "opten.hu".
+    """
+    names = (host(url, www=True), host(url), registrable_domain(url))
+    return any(name in blacklist for name in names)
+
+
+def get_main_url(url):
+    """
+    Get the root of a website, with the first path segment if it is a
+    Hungarian section (e.g. https://example.com/hu).
+    """
+    segment = parse(url).path.split('/')[1:2]
+    if segment and 'hu' in segment[0]:
+        return site_root(url) + '/' + segment[0]
+    return site_root(url)
+
+
+def get_search_engines():
+    """
+    Get the search engines used by get_official_url.
+    They are created on first use and reused, so their HTTP sessions are kept
+    between searches and importing this module doesn't load them.
+    """
+    global search_engines
+    if search_engines is None:
+        search_engines = [search_engines_dict[name]() for name in
+            ('google', 'bing', 'yahoo', 'aol', 'duckduckgo', 'startpage')]
+    return search_engines
+
+
 @healing_agent
-def get_official_url(company_name, city, search_engine_starters=[Google(),
-    Bing(), Yahoo(), Aol(), Duckduckgo(), Startpage()]):
+def get_official_url(company_name, city, search_engine_starters=None):
     """
     Get the official website URL for a company by searching for it online.
     Uses multiple search engines and filters out blacklisted domains.
@@ -193,10 +228,13 @@ def get_official_url(company_name, city, search_engine_starters=[Google(),
     Args:
         company_name: Name of the company
         city: City where company is located
+        search_engine_starters: Search engines to use (default: get_search_engines())
         
     Returns:
         str: Official website URL if found, "na" if blocked, None otherwise
     """
+    if search_engine_starters is None:
+        search_engine_starters = get_search_engines()
     # these will be an "na" result
     blacklist = ['opten.hu', 'linkedin.com', 'nemzeticegtar.hu', 'emis.com', 'cinando.com',
         'instagram.com', 'ceginformacio.hu', 'ceginfo.hu', 'twitter.com',
@@ -238,15 +276,10 @@ def get_official_url(company_name, city, search_engine_starters=[Google(),
                 logger.info(f'Filtered URLs from ScraperAPI: {filtered_urls}')
                 if filtered_urls:
                     first_url = filtered_urls[0]
-                    domain = first_url.split('/')[2].lower()
-                    if any(domain == blocked for blocked in blacklist):
+                    if is_blacklisted(first_url, blacklist):
                         logger.info(f'First ScraperAPI result for {company_name} was blocked: {first_url}')
                         return 'na'
-                    parts = first_url.split('/')
-                    if len(parts) > 3 and 'hu' in parts[3]:
-                        main_url = '/'.join(parts[:4])
-                    else:
-                        main_url = '/'.join(parts[:3])
+                    main_url = get_main_url(first_url)
                     logger.info(f'Found URL via ScraperAPI for {company_name}: {main_url}')
                     return main_url
     except Exception as e:
@@ -268,17 +301,12 @@ def get_official_url(company_name, city, search_engine_starters=[Google(),
                 return 'na'
             urls = filtered_urls
             first_url = urls[0]
-            domain = first_url.split('/')[2].lower()
-            if any(domain == blocked for blocked in blacklist):
+            if is_blacklisted(first_url, blacklist):
                 logger.info(
                     f'First result for {company_name} was blocked: {first_url}'
                     )
                 return 'na'
-            parts = first_url.split('/')
-            if len(parts) > 3 and 'hu' in parts[3]:
-                main_url = '/'.join(parts[:4])
-            else:
-                main_url = '/'.join(parts[:3])
+            main_url = get_main_url(first_url)
             logger.info(f'Found URL for {company_name}: {main_url}')
             return main_url
         except UnicodeEncodeError as ue:
@@ -315,7 +343,7 @@ def get_screenshot_url(official_url, row_number):
     screenshots_dir = 'screenshots'
     if not os.path.exists(screenshots_dir):
         os.makedirs(screenshots_dir)
-    domain = official_url.split('//')[-1].split('/')[0]
+    domain = host(official_url, www=True) or official_url
     clean_domain = re.sub('[^\\w\\-_]', '', domain)
     filename = f'{row_number}_{clean_domain}.jpg'
     filepath = os.path.join(screenshots_dir, filename)
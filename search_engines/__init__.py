@@ -1,4 +1,7 @@
-from .engines import *
+from importlib import import_module
+
+from . import engines
+from .engines import search_engines_dict
 
 
 __title__ = 'search_engines'
@@ -16,5 +19,18 @@ __all__ = [
     'Ask', 
     'Mojeek', 
     'Qwant',
-    'Torch'
+    'Torch',
+    'search_many'
 ]
+
+
+def __getattr__(name):
+    '''Imports the engines and `search_many` on first use, so importing the package stays cheap.'''
+    if name == 'search_many':
+        return import_module('.batch', __name__).search_many
+    if name in engines.__all__:
+        return getattr(engines, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
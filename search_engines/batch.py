@@ -0,0 +1,219 @@
+import os
+import io
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from queue import Queue, Empty
+from threading import Lock
+
+from .engines import search_engines_dict
+from . import output as out
+from . import config as cfg
+from .results import SearchResults
+
+
+COMPLETED = 'completed'
+'''The search went through its pages.'''
+SKIPPED = 'skipped'
+'''The search didn't run, the engine's circuit breaker is open.'''
+BANNED = 'banned'
+'''The engine banned us during the search.'''
+ERROR = 'error'
+'''A request failed or the search raised an error.'''
+
+
+class EnginePool(object):
+    '''Reusable engine instances, so each search gets an instance (and HTTP session) of its own.'''
+    def __init__(
+        self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT, rate_limits=None, sinks=None, parse_executor=None,
+        search_operator=None, ignore_duplicate_urls=False, ignore_duplicate_domains=False
+    ):
+        '''
+        :param str proxy: optional, a proxy server
+        :param int timeout: optional, the HTTP timeout
+        :param dict rate_limits: optional, (requests per second, burst) by engine name
+        :param list sinks: optional, ResultSink objects shared by all the instances
+        :param ParseExecutor parse_executor: optional, parses the pages of all the instances
+        :param str search_operator: optional, filters the results (url, title, text, host)
+        :param bool ignore_duplicate_urls: optional, collects only unique URLs in each search
+        :param bool ignore_duplicate_domains: optional, collects only unique domains in each search
+        '''
+        self.proxy = proxy
+        self.timeout = timeout
+        self.rate_limits = rate_limits or {}
+        self.sinks = sinks or []
+        self.parse_executor = parse_executor
+        self.search_operator = search_operator
+        self.ignore_duplicate_urls = ignore_duplicate_urls
+        self.ignore_duplicate_domains = ignore_duplicate_domains
+        self._idle = {}
+
+    def acquire(self, name):
+        '''Returns an idle instance of an engine, or a new one.'''
+        idle = self._idle.setdefault(name, Queue())
+        try:
+            return idle.get_nowait()
+        except Empty:
+            engine = search_engines_dict[name](self.proxy, self.timeout)
+            if name in self.rate_limits:
+                engine.set_rate_limit(*self.rate_limits[name])
+            engine.sinks = list(self.sinks)
+            engine.parse_executor = self.parse_executor
+            engine.ignore_duplicate_urls = self.ignore_duplicate_urls
+            engine.ignore_duplicate_domains = self.ignore_duplicate_domains
+            if self.search_operator:
+                engine.set_search_operator(self.search_operator)
+            return engine
+
+    def release(self, name, engine):
+        '''Returns an instance to the pool.'''
+        self._idle[name].put(engine)
+
+
+class Checkpoint(object):
+    '''The finished searches of a batch, kept in a file as a JSON line each, 
+    so a restarted batch can skip them.
+    '''
+    def __init__(self, path, fsync=True):
+        '''
+        :param str path: the progress file; created if it doesn't exist
+        :param bool fsync: optional, syncs every line to disk
+        '''
+        self.path = path
+        self.fsync = fsync
+        self.done = set()
+        '''The finished (query, engine name) searches.'''
+        self._lock = Lock()
+        if os.path.exists(path):
+            with io.open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.done.add((entry['query'], entry['engine']))
+        self._file = io.open(path, 'a', encoding='utf-8')
+        if self._file.tell() and not _ends_with_newline(path):
+            self._file.write(u'\n')
+
+    def __contains__(self, search):
+        return search in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def add(self, query, engine, results=0):
+        '''Records a finished search.
+
+        :param query: str The search query
+        :param engine: str The engine name
+        :param results: int Optional, the number of results
+        '''
+        entry = {u'query': query, u'engine': engine, u'results': results}
+        with self._lock:
+            self._file.write(json.dumps(entry) + u'\n')
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.done.add((query, engine))
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def search_many(
+    queries, engines=('google',), concurrency=4, pages=1, ordered=False,
+    proxy=cfg.PROXY, timeout=cfg.TIMEOUT, rate_limits=None, sinks=None, skip=(), 
+    parse_executor=None, search_operator=None, ignore_duplicate_urls=False, 
+    ignore_duplicate_domains=False
+):
+    '''Searches many queries with one or more engines, `concurrency` searches at a time.
+    Requests are throttled per host by the shared rate limiter.
+
+    :param queries: iterable of str The search queries
+    :param engines: iterable of str Optional, the engine names (default: google)
+    :param concurrency: int Optional, the number of parallel searches
+    :param pages: int Optional, the maximum number of results pages per search
+    :param ordered: bool Optional, yields in query order instead of as searches finish
+    :param proxy: str Optional, a proxy server
+    :param timeout: int Optional, the HTTP timeout
+    :param rate_limits: dict Optional, (requests per second, burst) by engine name
+    :param sinks: list Optional, ResultSink objects that receive the results as they are collected
+    :param skip: container Optional, (query, engine name) searches to skip, e.g. a Checkpoint
+    :param parse_executor: ParseExecutor Optional, parses the pages in worker processes
+    :param search_operator: str Optional, filters the results (url, title, text, host)
+    :param ignore_duplicate_urls: bool Optional, collects only unique URLs in each search
+    :param ignore_duplicate_domains: bool Optional, collects only unique domains in each search
+    :returns generator of (query, engine name, SearchResults, status) tuples; the status 
+        is COMPLETED, SKIPPED, BANNED or ERROR, and only completed searches are whole
+    '''
+    engines = [e.lower() for e in engines]
+    unknown = [e for e in engines if e not in search_engines_dict]
+    if unknown:
+        raise ValueError('Unknown search engine(s): ' + ', '.join(unknown))
+
+    pool = EnginePool(
+        proxy, timeout, rate_limits, sinks, parse_executor, 
+        search_operator, ignore_duplicate_urls, ignore_duplicate_domains
+    )
+    tasks = ((query, name) for query in queries for name in engines if (query, name) not in skip)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque()
+
+    def search(query, name):
+        engine = pool.acquire(name)
+        try:
+            if not engine.is_available():
+                return SearchResults(), SKIPPED
+            results = engine.search(query, pages)
+            if engine.is_complete:
+                return results, COMPLETED
+            return results, BANNED if engine.is_banned else ERROR
+        except Exception as e:
+            msg = u'{} failed on "{}": {!r}'.format(engine.__class__.__name__, query, e)
+            engine.progress.message(msg, level=out.Level.error)
+            return engine.results, ERROR
+        finally:
+            pool.release(name, engine)
+
+    def submit(count):
+        if count <= 0:
+            return
+        for query, name in tasks:
+            pending.append((query, name, executor.submit(search, query, name)))
+            count -= 1
+            if not count:
+                break
+
+    try:
+        submit(concurrency * 2)
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                wait([i[2] for i in pending], return_when=FIRST_COMPLETED)
+                done = [i for i in pending if i[2].done()]
+                for i in done:
+                    pending.remove(i)
+            for query, name, future in done:
+                results, status = future.result()
+                yield query, name, results, status
+            submit(len(done))
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _ends_with_newline(path):
+    '''Checks if a file ends with a line break (a crash may cut the last line short).'''
+    with io.open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
@@ -0,0 +1,176 @@
+import os
+import json
+import zlib
+import hashlib
+from time import time
+from threading import RLock
+from collections import OrderedDict
+
+from . import config as cfg
+
+
+class MemoryCache(object):
+    '''A bounded, thread-safe LRU cache with expiring entries.'''
+    def __init__(self, max_items=1000):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        '''Returns a value, or None if it's missing or expired.'''
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        '''Stores a value for `ttl` seconds.'''
+        with self._lock:
+            self._items[key] = (time() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        '''Removes all the entries.'''
+        with self._lock:
+            self._items.clear()
+
+
+class DiskCache(object):
+    '''A zlib-compressed file per entry, evicting the oldest files over `max_size` bytes.'''
+    def __init__(self, path=cfg.CACHE_DIR, max_size=256 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self._size = None
+        self._lock = RLock()
+
+    def get(self, key):
+        '''Returns a value, or None if it's missing or expired.'''
+        path = self._file(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except (IOError, OSError, ValueError, zlib.error):
+            return None
+        if entry['expires'] < time():
+            self._remove(path)
+            return None
+        return entry['value']
+
+    def set(self, key, value, ttl):
+        '''Stores a value for `ttl` seconds.'''
+        data = json.dumps({'expires': time() + ttl, 'value': value})
+        data = zlib.compress(data.encode('utf-8'))
+        path = self._file(key)
+        with self._lock:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            self.size()
+            self._remove(path)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+            self._size += len(data)
+            if self._size > self.max_size:
+                self._evict()
+
+    def size(self):
+        '''Returns the size of the stored entries, in bytes.'''
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(i) for i in self._files())
+            return self._size
+
+    def clear(self):
+        '''Removes all the entries.'''
+        with self._lock:
+            for path in self._files():
+                self._remove(path)
+
+    def _evict(self):
+        '''Removes the oldest entries until the cache is below 90% of its maximum size.'''
+        files = sorted(self._files(), key=os.path.getmtime)
+        while files and self._size > self.max_size * 0.9:
+            self._remove(files.pop(0))
+
+    def _remove(self, path):
+        '''Deletes an entry file.'''
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._size is not None:
+                self._size -= size
+
+    def _files(self):
+        '''Returns the paths of the entry files.'''
+        if not os.path.isdir(self.path):
+            return []
+        return [
+            os.path.join(self.path, i)
+            for i in os.listdir(self.path) if i.endswith('.z')
+        ]
+
+    def _file(self, key):
+        '''Returns the path of an entry file.'''
+        return os.path.join(self.path, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.z')
+
+
+class ResponseCache(object):
+    '''Caches result pages by engine, query, page number and post data.
+    A memory LRU sits in front of an optional on-disk store.
+    '''
+    def __init__(self, path=None, ttl=24 * 3600, ttls=None, max_items=1000, max_size=256 * 1024 * 1024):
+        '''
+        :param str path: optional, the on-disk store directory (memory only if not set)
+        :param int ttl: optional, seconds pages are kept
+        :param dict ttls: optional, seconds pages are kept by engine name, e.g. {'google': 3600}
+        :param int max_items: optional, the memory cache size
+        :param int max_size: optional, the on-disk store size in bytes
+        '''
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.memory = MemoryCache(max_items)
+        self.disk = DiskCache(path, max_size) if path else None
+
+    def get(self, engine, query, page, data=None):
+        '''Returns a cached page as (http, html), or None.'''
+        key = self.key(engine, query, page, data)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value, self._ttl(engine))
+        return tuple(value) if value is not None else None
+
+    def set(self, engine, query, page, data, response):
+        '''Stores a page.'''
+        key = self.key(engine, query, page, data)
+        value = (response.http, response.html)
+        ttl = self._ttl(engine)
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def clear(self):
+        '''Removes all cached pages.'''
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def key(self, engine, query, page, data=None):
+        '''Returns the cache key of a page.'''
+        query = u' '.join(query.lower().split())
+        data = sorted((data or {}).items())
+        return json.dumps([engine.lower(), query, page, data])
+
+    def _ttl(self, engine):
+        return self.ttls.get(engine.lower(), self.ttl)
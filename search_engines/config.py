@@ -8,6 +8,12 @@ PYTHON_VERSION = version_info.major
 ## Maximum number or pages to search
 SEARCH_ENGINE_RESULTS_PAGES = 20
 
+## HTML parser backend - 'html.parser', 'lxml' or 'lexbor' (selectolax)
+HTML_PARSER = 'html.parser'
+
+## Directory of the rate limiter state, to throttle requests across processes (None: per process)
+RATE_LIMIT_DIR = None
+
 ## HTTP request timeout 
 TIMEOUT = 10
 
@@ -28,3 +34,12 @@ _base_dir = os_path.abspath(os_path.dirname(os_path.abspath(__file__)))
 ## Path to output files 
 OUTPUT_DIR = os_path.join(_base_dir, 'search_results') + os_path.sep
 
+## Rows per HTML report page; bigger reports are split into linked files (None: one file)
+HTML_REPORT_PAGE_ROWS = 5000
+
+## Path to a copy of the public suffix list (publicsuffix.org); None: a built-in list of common suffixes
+PUBLIC_SUFFIX_LIST = None
+
+## Path to the on-disk response cache 
+CACHE_DIR = os_path.join(_base_dir, 'cache')
+
@@ -1,26 +1,46 @@
-from bs4 import BeautifulSoup
-from time import sleep
+from time import time
+from threading import Event
 from random import uniform as random_uniform
-from collections import namedtuple
+from functools import partial
 
 from .results import SearchResults
 from .http_client import HttpClient
+from .extraction import ExtractionPlan
+from .health import scoreboard
+from .progress import Progress
+from .metrics import metrics
 from . import utils
+from . import parsers
 from . import output as out
 from . import config as cfg
 
 
 class SearchEngine(object):
     '''The base class for all Search Engines.'''
+    _rate_limit = (0.4, 2)
+    '''Requests per second and burst allowed per host; see `set_rate_limit`.'''
+    _session_ttl = 30 * 60
+    '''Seconds the state obtained by `_bootstrap` is reused for.'''
+    _parse_offload = True
+    '''Indicates if `_filter_results` and `_next_page` can run in a parse executor's worker (they make no requests).'''
+
     def __init__(self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
         '''
-        :param str proxy: optional, a proxy server  
+        :param str proxy: optional, a proxy server, or a ProxyPool  
         :param int timeout: optional, the HTTP timeout
         '''
         self._http_client = HttpClient(timeout, proxy) 
+        self._http_client.proxy_key = self.__class__.__name__
+        self._http_client.rate_limit = self._rate_limit
+        self._http_client.observer = self._observe_request
+        self._http_client.wait = self._pause
         self._delay = (1, 4)
         self._query = ''
         self._filters = []
+        self._deadline = None
+        self._cancelled = Event()
+        self._fields = (None, {})
+        self._session_reused = False
 
         self.results = SearchResults()
         '''The search results.'''
@@ -30,6 +50,34 @@ class SearchEngine(object):
         '''Collects only unique domains.'''
         self.is_banned = False
         '''Indicates if a ban occured'''
+        self.is_complete = False
+        '''Indicates if the last search went through its pages, without a failed request or a stop.'''
+        self.parser = None
+        '''The HTML parser backend, see `parsers`. Uses config.HTML_PARSER if not set.'''
+        self.parse_count = 0
+        '''Number of pages parsed by this engine.'''
+        self.cache = None
+        '''A `cache.ResponseCache`. Cached pages skip the request and the politeness delay.'''
+        self.parse_executor = None
+        '''An `executor.ParseExecutor` that parses and extracts the pages in worker processes.'''
+        self.scoreboard = scoreboard
+        '''Engine health and circuit breakers, shared by all engines in the process.'''
+        self.sinks = []
+        '''`output.ResultSink` objects the results of each page are written to as they're collected.'''
+        self.progress = Progress(self.__class__.__name__)
+        '''Reports search progress to the console and to subscribers, see `progress.Progress`.'''
+        self.metrics = metrics
+        '''Request and page timing histograms, shared by all engines in the process.'''
+
+    @property
+    def _plan(self):
+        '''The compiled selectors of the engine, see `extraction.ExtractionPlan`. 
+        Compiled on first use, so `_selectors` may read instance attributes.
+        '''
+        plan = self.__dict__.get('_extraction_plan')
+        if plan is None:
+            plan = self._extraction_plan = ExtractionPlan.compile(self)
+        return plan
 
     def _selectors(self, element):
         '''Returns the appropriate CSS selector.'''
@@ -39,25 +87,65 @@ class SearchEngine(object):
         '''Returns the initial page URL.'''
         raise NotImplementedError()
     
+    def _reset(self):
+        '''Resets the pagination state of a previous search. Runs before each search.'''
+        pass
+    
+    def _bootstrap(self):
+        '''Requests the pages a new session needs before searching (home page, forms).
+        Returns the state `_first_page` needs, or None if it couldn't be obtained.
+        '''
+        raise NotImplementedError()
+    
+    def _session_state(self):
+        '''Returns the bootstrap state of the HTTP session. 
+        It's reused across queries until it expires or a first page fails with it.
+        '''
+        key = self.__class__.__name__
+        state = self._http_client.session_state(key)
+        self._session_reused = state is not None
+        if state is None:
+            state = self._bootstrap()
+            if state is not None:
+                self._http_client.set_session_state(key, state, self._session_ttl)
+        return state
+    
+    def _renew_session(self):
+        '''Drops reused bootstrap state after a failed first page. 
+        Returns True if the first page should be requested again.
+        '''
+        if not self._session_reused or self.is_banned:
+            return False
+        self._http_client.clear_session_state(self.__class__.__name__)
+        self._session_reused = False
+        return True
+    
     def _next_page(self, tags):
         '''Returns the next page URL and post data.'''
         raise NotImplementedError()
     
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results items.'''
-        selector = self._selectors('url')
-        url = self._get_tag_item(tag.select_one(selector), item)
+        url = self._get_tag_item(self._select_field(tag, 'url'), item)
         return utils.unquote_url(url)
     
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
-        selector = self._selectors('title')
-        return self._get_tag_item(tag.select_one(selector), item)
+        return self._get_tag_item(self._select_field(tag, 'title'), item)
     
     def _get_text(self, tag, item='text'):
         '''Returns the text of search results items.'''
-        selector = self._selectors('text')
-        return self._get_tag_item(tag.select_one(selector), item)
+        return self._get_tag_item(self._select_field(tag, 'text'), item)
+    
+    def _select_field(self, tag, field):
+        '''Returns the url, title or text tag of a search results item. 
+        The fields of the last item are memoized, so each item is searched once.
+        '''
+        if self._fields[0] is not tag:
+            self._fields = (tag, self._plan.find_fields(tag))
+        if field not in self._fields[1]:
+            return tag.select_one(self._selectors(field))
+        return self._fields[1][field]
     
     def _get_page(self, page, data=None):
         '''Gets pagination links.'''
@@ -65,6 +153,120 @@ class SearchEngine(object):
             return self._http_client.post(page, data)
         return self._http_client.get(page)
     
+    async def _aget_page(self, page, data=None):
+        '''Gets pagination links asynchronously.'''
+        if type(self)._get_page is not SearchEngine._get_page:
+            # engines that hook into _get_page (e.g. consent checks) keep their blocking path 
+            return await self._run_sync(self._get_page, page, data)
+        if data:
+            return await self._http_client.apost(page, data)
+        return await self._http_client.aget(page)
+    
+    async def _run_sync(self, func, *args):
+        '''Runs a blocking engine hook in a worker thread.'''
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args))
+    
+    def _request_page(self, request):
+        '''Requests a result page and records the outcome in the health scoreboard.'''
+        start = time()
+        response = self._get_page(request['url'], request['data'])
+        return self._record_health(response, time() - start)
+    
+    async def _arequest_page(self, request):
+        '''Requests a result page asynchronously and records the outcome in the health scoreboard.'''
+        start = time()
+        response = await self._aget_page(request['url'], request['data'])
+        return self._record_health(response, time() - start)
+    
+    def _record_health(self, response, latency):
+        '''Checks the response and records the outcome. Returns None if it's not OK.
+        A request dropped because the search stopped isn't recorded.
+        '''
+        if response.http == 0 and self._is_stopped():
+            return None
+        is_ok = self._is_ok(response)
+        self.scoreboard.record(self.__class__.__name__, is_ok, latency, self.is_banned)
+        return response if is_ok else None
+    
+    def _cached_page(self, page, data=None):
+        '''Returns a cached result page, or None.
+        The first page is looked up before `_first_page` runs, so it is stored without post data.
+        '''
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.__class__.__name__, self._query, page, data if page > 1 else None)
+        return self._http_client.response(*cached) if cached else None
+    
+    def _cache_page(self, page, data, response):
+        '''Stores a result page in the cache.'''
+        if self.cache is not None:
+            self.cache.set(self.__class__.__name__, self._query, page, data if page > 1 else None, response)
+    
+    def _is_stopped(self):
+        '''Checks if the search was cancelled or ran past its deadline.'''
+        if self._deadline is not None and time() >= self._deadline:
+            return True
+        return self._cancelled.is_set()
+    
+    def _pause(self, delay):
+        '''Waits between requests; returns early if the search is cancelled. 
+        Returns True if the search was stopped.
+        '''
+        if self._deadline is not None:
+            delay = max(0, min(delay, self._deadline - time()))
+        self._cancelled.wait(delay)
+        return self._is_stopped()
+    
+    def _parse(self, html):
+        '''Parses a HTML page with the engine's parser backend.'''
+        return parsers.parse(html, self.parser)
+    
+    def _document(self, response):
+        '''Returns the parsed page of a response. Each response is parsed only once.'''
+        if response.document is None:
+            start = time()
+            response.document = self._parse(response.html)
+            self.parse_count += 1
+            self.metrics.record_page(self.__class__.__name__, {'parse': time() - start})
+        return response.document
+    
+    def _extract(self, tags):
+        '''Extracts and collects the results of a parsed page. Returns the new items.'''
+        start = time()
+        items = self._collect_results(self._filter_results(tags))
+        timing = {'extract': time() - start, 'results': len(items)}
+        self.metrics.record_page(self.__class__.__name__, timing)
+        return items
+    
+    def _extract_page(self, response):
+        '''Extracts the new results of a page. Returns them, and a function that returns 
+        the next page request. The page is parsed by the parse executor, if there is one.
+        '''
+        if self.parse_executor is None or not self._parse_offload or response.document is not None:
+            tags = self._document(response)
+            return self._extract(tags), partial(self._next_page, tags)
+
+        parsed = self.parse_executor.parse(self, response.html)
+        self.parse_count += 1
+        self.metrics.record_page(self.__class__.__name__, {'parse': parsed.timing['parse']})
+        start = time()
+        items = self._collect_results(parsed.items)
+        timing = {'extract': parsed.timing['extract'] + time() - start, 'results': len(items)}
+        self.metrics.record_page(self.__class__.__name__, timing)
+        return items, lambda: parsed.request
+    
+    async def _aextract_page(self, response):
+        '''Async version of `_extract_page`; waits for the parse executor in a worker thread.'''
+        if self.parse_executor is None:
+            return self._extract_page(response)
+        return await self._run_sync(self._extract_page, response)
+    
+    def _observe_request(self, timing):
+        '''Records the timings of a request made by this engine.'''
+        self.metrics.record_request(self.__class__.__name__, timing)
+    
     def _get_tag_item(self, tag, item):
         '''Returns Tag attributes.'''
         if not tag:
@@ -73,9 +275,10 @@ class SearchEngine(object):
 
     def _item(self, link):
         '''Returns a dictionary of the link data.'''
+        url = self._get_url(link)
         return {
-            'host': utils.domain(self._get_url(link)), 
-            'link': self._get_url(link), 
+            'host': utils.domain(url), 
+            'link': url, 
             'title': self._get_title(link).strip(), 
             'text': self._get_text(link).strip()
         } 
@@ -86,9 +289,12 @@ class SearchEngine(object):
     
     def _filter_results(self, soup):
         '''Processes and filters the search results.''' 
-        tags = soup.select(self._selectors('links'))
+        tags = self._plan.select(soup, 'links')
         results = [self._item(l) for l in tags]
-
+        return self._apply_filters(results)
+    
+    def _apply_filters(self, results):
+        '''Keeps the results that match the search operators.'''
         if u'url' in self._filters:
             results = [l for l in results if self._query_in(l['link'])]
         if u'title' in self._filters:
@@ -100,17 +306,25 @@ class SearchEngine(object):
         return results
     
     def _collect_results(self, items):
-        '''Colects the search results items.''' 
+        '''Colects the search results items. Returns the items that were added.''' 
+        collected = []
         for item in items:
             if not utils.is_url(item['link']):
                 continue
             if item in self.results:
                 continue
-            if self.ignore_duplicate_urls and item['link'] in self.results.links():
+            if self.ignore_duplicate_urls and self.results.contains_link(item['link']):
                 continue
-            if self.ignore_duplicate_domains and item['host'] in self.results.hosts():
+            if self.ignore_duplicate_domains and self.results.contains_host(item['host']):
                 continue
             self.results.append(item)
+            collected.append(item)
+        return collected
+
+    def _write_sinks(self, items):
+        '''Writes the results of a page to the sinks.'''
+        for sink in self.sinks:
+            sink.write(self._query, self.__class__.__name__, items)
 
     def _is_ok(self, response):
         '''Checks if the HTTP response is 200 OK.'''
@@ -119,12 +333,44 @@ class SearchEngine(object):
         if response.http == 200:
             return True
         msg = ('HTTP ' + str(response.http)) if response.http else response.html
-        out.console(msg, level=out.Level.error)
+        self.progress.message(msg, level=out.Level.error)
         return False
     
+    def is_available(self):
+        '''Checks if the engine's circuit breaker lets requests through.'''
+        return self.scoreboard.allow(self.__class__.__name__)
+    
+    def cancel(self):
+        '''Stops the running search after the current request.'''
+        self._cancelled.set()
+    
     def disable_console(self):
-        '''Disables console output'''
-        out.console = lambda msg, end='\n', level=None: None
+        '''Disables the console output of this engine'''
+        self.progress.console = False
+    
+    def set_rate_limit(self, rate, capacity=1):
+        '''Throttles the requests to each host with a token bucket shared by 
+        all engines in the process. It replaces the random delay between pages.
+        
+        :param rate: float Requests per second, or None to use the random delay
+        :param capacity: int Optional, the burst size
+        '''
+        self._http_client.rate_limit = (rate, capacity) if rate else None
+    
+    def record(self, path):
+        '''Writes every request and response to an archive, for offline replay.
+        
+        :param path: str The archive file, or None to stop recording
+        '''
+        self._http_client.record(path)
+    
+    def replay(self, path, latency=None):
+        '''Serves the pages from a recorded archive instead of the network.
+        
+        :param path: str The archive file, or None to stop replaying
+        :param latency: float Optional, seconds each page is delayed, or 'recorded'
+        '''
+        self._http_client.replay(path, latency)
     
     def set_headers(self, headers):
         '''Sets HTTP headers.
@@ -145,7 +391,7 @@ class SearchEngine(object):
         for operator in operators:
             if operator not in supported_operators:
                 msg = u'Ignoring unsupported operator "{}"'.format(operator)
-                out.console(msg, level=out.Level.warning)
+                self.progress.message(msg, level=out.Level.warning)
             else:
                 self._filters += [operator]
     
@@ -156,50 +402,200 @@ class SearchEngine(object):
         :param pages: int Optional, the maximum number of results pages to search  
         :returns SearchResults object
         '''
-        out.console('Searching {}'.format(self.__class__.__name__))
+        for _ in self.iter_results(query, pages):
+            pass
+        return self.results
+    
+    def iter_results(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Queries the search engine and yields the new results of each page as it's collected.
+        Pages are requested as the results are consumed, so stopping the iteration 
+        stops the search. `results` holds everything collected so far.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns generator of result items (dict)
+        '''
         self._query = utils.decode_bytes(query)
         self.results = SearchResults()
-        request = self._first_page()
+        self.is_complete = False
+        self._reset()
+        self.progress.start(self._query)
+        if not self.is_available():
+            self.progress.message('Circuit breaker is open, skipping', level=out.Level.warning)
+            self.is_banned = True
+            return
+        response = self._cached_page(1)
+        request = self._first_page() if response is None else None
 
-        for page in range(1, pages + 1):
-            try:
-                response = self._get_page(request['url'], request['data'])
-                if not self._is_ok(response):
-                    break
-                tags = BeautifulSoup(response.html, "html.parser")
-                items = self._filter_results(tags)
-                self._collect_results(items)
-                
-                msg = 'page: {:<8} links: {}'.format(page, len(self.results))
-                out.console(msg, end='')
-                request = self._next_page(tags)
-
-                if not request['url']:
+        page = 0
+        try:
+            for page in range(1, pages + 1):
+                try:
+                    if self._is_stopped():
+                        break
+                    if response is None:
+                        response = self._request_page(request)
+                        if response is None and page == 1 and self._renew_session():
+                            request = self._first_page()
+                            response = self._request_page(request)
+                        if response is None:
+                            break
+                        self._cache_page(page, request['data'], response)
+                    items, next_page = self._extract_page(response)
+                    self._write_sinks(items)
+                    for item in items:
+                        yield item
+                    
+                    self.progress.page(page, len(self.results))
+                    request = next_page()
+
+                    if not request['url']:
+                        self.is_complete = True
+                        break
+                    response = self._cached_page(page + 1, request['data'])
+                    if page < pages and response is None and not self._http_client.rate_limit:
+                        self._pause(random_uniform(*self._delay))
+                except KeyboardInterrupt:
                     break
-                if page < pages:
-                    sleep(random_uniform(*self._delay))
-            except KeyboardInterrupt:
-                break
-        out.console('', end='')
+            else:
+                self.is_complete = True
+        finally:
+            self._cancelled.clear()
+            for sink in self.sinks:
+                sink.flush()
+            self.progress.done(page, len(self.results))
+    
+    async def asearch(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Awaitable version of `search`. 
+        Pages are requested through the async HTTP transport and the politeness 
+        delay doesn't block the event loop. Engine hooks that make their own 
+        requests (`_first_page`, `_next_page`) run in a worker thread.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns SearchResults object
+        '''
+        async for _ in self.aiter_results(query, pages):
+            pass
         return self.results
     
+    async def aiter_results(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Async generator version of `iter_results`.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns async generator of result items (dict)
+        '''
+        import asyncio
+        self._query = utils.decode_bytes(query)
+        self.results = SearchResults()
+        self.is_complete = False
+        self._reset()
+        self.progress.start(self._query)
+        if not self.is_available():
+            self.progress.message('Circuit breaker is open, skipping', level=out.Level.warning)
+            self.is_banned = True
+            return
+        response = self._cached_page(1)
+        request = await self._run_sync(self._first_page) if response is None else None
+
+        page = 0
+        try:
+            for page in range(1, pages + 1):
+                try:
+                    if self._is_stopped():
+                        break
+                    if response is None:
+                        response = await self._arequest_page(request)
+                        if response is None and page == 1 and self._renew_session():
+                            request = await self._run_sync(self._first_page)
+                            response = await self._arequest_page(request)
+                        if response is None:
+                            break
+                        self._cache_page(page, request['data'], response)
+                    items, next_page = await self._aextract_page(response)
+                    self._write_sinks(items)
+                    for item in items:
+                        yield item
+                    
+                    self.progress.page(page, len(self.results))
+                    request = await self._run_sync(next_page)
+
+                    if not request['url']:
+                        self.is_complete = True
+                        break
+                    response = self._cached_page(page + 1, request['data'])
+                    if page < pages and response is None and not self._http_client.rate_limit:
+                        await asyncio.sleep(random_uniform(*self._delay))
+                except KeyboardInterrupt:
+                    break
+            else:
+                self.is_complete = True
+        finally:
+            self._cancelled.clear()
+            for sink in self.sinks:
+                sink.flush()
+            self.progress.done(page, len(self.results))
+    
+    async def aclose(self):
+        '''Releases the async HTTP transport.'''
+        await self._http_client.aclose()
+    
     def output(self, output=out.PRINT, path=None):
         '''Prints search results and/or creates report files.
-        Supported output format: html, csv, json.
+        Supported output format: html, csv, json, jsonl. 
+        Formats already written by `sinks` are skipped.
         
         :param output: str Optional, the output format  
         :param path: str Optional, the file to save the report  
         '''
-        output = (output or '').lower()
+        formats = out.output_formats(output)
+        streamed = [sink.format for sink in self.sinks]
         if not path:
             path = cfg.os_path.join(cfg.OUTPUT_DIR, u'_'.join(self._query.split()))
         out.console('')
 
-        if out.PRINT in output:
+        if out.PRINT in formats:
             out.print_results([self])
-        if out.HTML in output:
-            out.write_file(out.create_html_data([self]), path + u'.html') 
-        if out.CSV in output:
+        if out.HTML in formats:
+            out.write_html([self], path + u'.html') 
+        if out.CSV in formats and out.CSV not in streamed:
             out.write_file(out.create_csv_data([self]), path + u'.csv') 
-        if out.JSON in output:
+        if out.JSON in formats:
             out.write_file(out.create_json_data([self]), path + u'.json')
+        if out.JSONL in formats and out.JSONL not in streamed:
+            out.write_jsonl([self], path + u'.jsonl')
+
+
+class JsonSearchEngine(SearchEngine):
+    '''The base class for engines that return JSON.
+    Each response is decoded once, without HTML parsing, and the decoded object 
+    is what `_filter_results` and `_next_page` receive. The `links` selector is 
+    the key path of the result items, the field selectors are their keys.
+    '''
+    def _parse(self, text):
+        '''Decodes a JSON response.'''
+        return parsers.parse_json(text)
+    
+    def _links(self, data):
+        '''Returns the result items of a decoded response.'''
+        for key in self._selectors('links'):
+            data = data.get(key) if isinstance(data, dict) else None
+        return data or []
+    
+    def _get_url(self, item, key='url'):
+        '''Returns the URL of search results item.'''
+        return utils.unquote_url(item.get(self._selectors(key)) or u'')
+    
+    def _get_title(self, item, key='title'):
+        '''Returns the title of search results items.'''
+        return item.get(self._selectors(key)) or u''
+    
+    def _get_text(self, item, key='text'):
+        '''Returns the text of search results items.'''
+        return item.get(self._selectors(key)) or u''
+    
+    def _filter_results(self, data):
+        '''Processes and filters the search results.''' 
+        results = [self._item(i) for i in self._links(data)]
+        return self._apply_filters(results)
@@ -1,28 +1,81 @@
-from .aol import Aol
-from .ask import Ask
-from .bing import Bing
-from .dogpile import Dogpile
-from .duckduckgo import Duckduckgo
-from .google import Google
-from .mojeek import Mojeek
-from .startpage import Startpage
-from .torch import Torch
-from .yahoo import Yahoo
-from .qwant import Qwant
-from .brave import Brave
-
-
-search_engines_dict = { 
-    'google': Google, 
-    'bing': Bing, 
-    'yahoo': Yahoo, 
-    'aol': Aol, 
-    'duckduckgo': Duckduckgo, 
-    'startpage': Startpage, 
-    'dogpile': Dogpile, 
-    'ask': Ask, 
-    'mojeek': Mojeek, 
-    'qwant': Qwant, 
-    'brave': Brave,
-    'torch': Torch 
-}
+from importlib import import_module
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+class EngineRegistry(MutableMapping):
+    '''The search engine classes by name.
+    An engine's module (and with it requests, bs4 etc.) is imported the first time
+    its class is requested; listing and checking the names imports nothing.
+    '''
+    def __init__(self, engines):
+        '''
+        :param dict engines: the class paths ('module:Class') by engine name
+        '''
+        self._paths = dict(engines)
+        self._classes = {}
+
+    def __getitem__(self, name):
+        if name not in self._classes:
+            module, cls = self._paths[name].split(':')
+            self._classes[name] = getattr(import_module(module, __name__), cls)
+        return self._classes[name]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, name):
+        return name in self._paths
+
+    def __setitem__(self, name, cls):
+        '''Adds an engine class, e.g. search_engines_dict['metager'] = Metager.'''
+        self._paths[name] = '{}:{}'.format(cls.__module__, cls.__name__)
+        self._classes[name] = cls
+
+    def __delitem__(self, name):
+        del self._paths[name]
+        self._classes.pop(name, None)
+
+    def register(self, name, path):
+        '''Adds an engine, e.g. register('metager', 'search_engines.engines.metager:Metager').'''
+        self._paths[name] = path
+        self._classes.pop(name, None)
+
+    def class_name(self, name):
+        '''Returns the class name of an engine, without importing it.'''
+        return self._paths[name].split(':')[1]
+
+
+search_engines_dict = EngineRegistry({
+    'google': '.google:Google',
+    'bing': '.bing:Bing',
+    'yahoo': '.yahoo:Yahoo',
+    'aol': '.aol:Aol',
+    'duckduckgo': '.duckduckgo:Duckduckgo',
+    'startpage': '.startpage:Startpage',
+    'dogpile': '.dogpile:Dogpile',
+    'ask': '.ask:Ask',
+    'mojeek': '.mojeek:Mojeek',
+    'qwant': '.qwant:Qwant',
+    'brave': '.brave:Brave',
+    'torch': '.torch:Torch'
+})
+
+__all__ = [search_engines_dict.class_name(name) for name in search_engines_dict]
+
+
+def __getattr__(name):
+    '''Imports engine classes on first use (e.g. `from search_engines.engines import Google`).'''
+    for engine in search_engines_dict:
+        if search_engines_dict.class_name(engine) == name:
+            return search_engines_dict[engine]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
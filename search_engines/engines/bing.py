@@ -23,9 +23,14 @@ class Bing(SearchEngine):
         }
         return selectors[element]
     
+    def _bootstrap(self):
+        '''Gets the home page, which sets the session cookies.'''
+        response = self._get_page(self._base_url)
+        return True if response.http == 200 else None
+
     def _first_page(self):
         '''Returns the initial page and query.'''
-        self._get_page(self._base_url)
+        self._session_state()
         url = u'{}/search?q={}&search=&form=QBLH'.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
@@ -21,6 +21,10 @@ class Duckduckgo(SearchEngine):
         }
         return selectors[element]
     
+    def _reset(self):
+        '''Starts the next search at the first page.'''
+        self._current_page = 1
+    
     def _first_page(self):
         '''Returns the initial page and query.'''
         url = u'{}/html/?q={}'.format(self._base_url, quote_url(self._query, ''))
@@ -38,8 +42,7 @@ class Duckduckgo(SearchEngine):
 
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results item.'''
-        selector = self._selectors('url')
-        url = self._get_tag_item(tag.select_one(selector), item)
+        url = self._get_tag_item(self._select_field(tag, 'url'), item)
 
         if url.startswith(u'/url?q='):
             url = url.replace(u'/url?q=', u'').split(u'&sa=')[0]
@@ -2,12 +2,13 @@ from ..engine import SearchEngine
 from ..config import PROXY, TIMEOUT, FAKE_USER_AGENT
 from ..utils import unquote_url, quote_url
 from .. import output as out
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, parse_qs
 
 
 class Google(SearchEngine):
     '''Searches google.com'''
+    _rate_limit = (0.25, 3)
+
     def __init__(self, proxy=PROXY, timeout=TIMEOUT):
         super(Google, self).__init__(proxy, timeout)
         self._base_url = 'https://www.google.com'
@@ -26,11 +27,11 @@ class Google(SearchEngine):
         }
         return selectors[element]
     
-    def _first_page(self):
-        '''Returns the initial page and query.'''
+    def _bootstrap(self):
+        '''Follows the first search to the results page and returns its form inputs.'''
         url = u'{}/search?q={}'.format(self._base_url, quote_url(self._query, ''))
         response = self._get_page(url)
-        bs = BeautifulSoup(response.html, "html.parser")
+        bs = self._document(response)
         
         noscript_link = bs.select_one('noscript a')
         if noscript_link and 'href' in noscript_link.attrs:
@@ -51,12 +52,17 @@ class Google(SearchEngine):
                     url = u'{}{}'.format(self._base_url, url)
             else:
                 msg = "Warning: Could not find expected 'noscript a' element or any 'a' tag with 'data-ved'. Using original URL."
-                out.console(msg, level=out.Level.error)
+                self.progress.message(msg, level=out.Level.error)
         
         response = self._get_page(url)
-        bs = BeautifulSoup(response.html, "html.parser")
+        bs = self._document(response)
 
-        inputs = {i['name']:i.get('value') for i in bs.select('form input[name]') if i['name'] != 'btnI'}
+        inputs = {i['name']:i.get('value') for i in bs.select('form input[name]') if i['name'] not in ('btnI', 'q')}
+        return inputs or None
+
+    def _first_page(self):
+        '''Returns the initial page and query.'''
+        inputs = dict(self._session_state() or {})
         inputs['q'] = quote_url(self._query, '')
         url = u'{}/search?{}'.format(self._base_url, '&'.join([k + '=' + (v or '') for k,v in inputs.items()]))
 
@@ -75,8 +81,7 @@ class Google(SearchEngine):
 
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results item.'''
-        selector = self._selectors('url')
-        url = self._get_tag_item(tag.select_one(selector), item)
+        url = self._get_tag_item(self._select_field(tag, 'url'), item)
 
         if url.startswith(u'/url?q='):
             url = url.replace(u'/url?q=', u'').split(u'&sa=')[0]
@@ -84,13 +89,16 @@ class Google(SearchEngine):
 
     def _get_text(self, tag, item='text'):
         '''Returns the text of search results items.'''
-        tag = tag.select_one(self._selectors('text'))
+        tag = self._select_field(tag, 'text')
         return '\n'.join(list(tag.stripped_strings)[2:]) if tag else ''
 
     def _check_consent(self, page):
-        '''Checks if cookies consent is required'''
+        '''Checks if cookies consent is required. 
+        Result pages aren't parsed here, so they can go to the parse executor.'''
         url = 'https://consent.google.com/save'
-        bs = BeautifulSoup(page.html, "html.parser")
+        if url not in page.html:
+            return page
+        bs = self._document(page)
         consent_form = bs.select('form[action="{}"] input[name]'.format(url))
         if consent_form:
             data = {i['name']:i.get('value') for i in consent_form if i['name'] not in ['set_sc', 'set_aps']}
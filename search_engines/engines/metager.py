@@ -1,11 +1,11 @@
-from bs4 import BeautifulSoup
-
 from search_engines.engine import SearchEngine
 from search_engines.config import PROXY, TIMEOUT, FAKE_USER_AGENT
 
 
 class Metager(SearchEngine):
     '''Searches metager.org'''
+    _parse_offload = False
+    '''`_next_page` requests the redirect page.'''
 
     def __init__(self, proxy=PROXY, timeout=TIMEOUT):
         super(Metager, self).__init__(proxy, timeout)
@@ -26,7 +26,7 @@ class Metager(SearchEngine):
     def redirect(self, query):
         '''Redirects initial request to actual result page.'''
         response = self._get_page(query)
-        src_page = BeautifulSoup(response.html, "html.parser")
+        src_page = self._document(response)
         url = src_page.select_one('iframe').get('src')
 
         return url
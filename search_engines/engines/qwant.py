@@ -1,11 +1,8 @@
-from json import loads
-
-from ..engine import SearchEngine
+from ..engine import JsonSearchEngine
 from ..config import PROXY, TIMEOUT
-from ..utils import unquote_url
 
 
-class Qwant(SearchEngine):
+class Qwant(JsonSearchEngine):
     '''Searches qwant.com'''
     def __init__(self, proxy=PROXY, timeout=TIMEOUT):
         super(Qwant, self).__init__(proxy, timeout)
@@ -23,44 +20,24 @@ class Qwant(SearchEngine):
         }
         return selectors[element]
     
+    def _reset(self):
+        '''Starts the next search at the first offset.'''
+        self._offset = 0
+    
     def _first_page(self):
         '''Returns the initial page and query.'''
         url = self._base_url.format(self._query, self._offset)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, data):
         '''Returns the next page URL and post data (if any)'''
         self._offset += 10
         url = None
-        status = loads(tags.get_text())['status']
-        if status == 'success' and self._offset <= self._max_offset:
+        if data.get('status') == 'success' and self._offset <= self._max_offset:
             url = self._base_url.format(self._query, self._offset)
         return {'url':url, 'data':None}
 
-    def _get_url(self, tag, item='href'):
-        '''Returns the URL of search results item.'''
-        return unquote_url(tag.get(self._selectors('url'), u''))
-    
-    def _get_title(self, tag, item='text'):
-        '''Returns the title of search results items.'''
-        return tag.get(self._selectors('title'), u'')
-    
-    def _get_text(self, tag, item='text'):
-        '''Returns the text of search results items.'''
-        return tag.get(self._selectors('text'), u'')
-    
-    def _filter_results(self, soup):
-        '''Processes and filters the search results.''' 
-        tags = loads(soup.get_text())['data']['result']['items']['mainline']
-        tags = [j for i in tags for j in i['items'] if i['type'] != u'ads']
-        results = [self._item(l) for l in tags]
-
-        if u'url' in self._filters:
-            results = [l for l in results if self._query_in(l['link'])]
-        if u'title' in self._filters:
-            results = [l for l in results if self._query_in(l['title'])]
-        if u'text' in self._filters:
-            results = [l for l in results if self._query_in(l['text'])]
-        if u'host' in self._filters:
-            results = [l for l in results if self._query_in(utils.domain(l['link']))]
-        return results
+    def _links(self, data):
+        '''Returns the result items of the mainline groups, except ads.'''
+        groups = super(Qwant, self)._links(data)
+        return [j for i in groups for j in i['items'] if i['type'] != u'ads']
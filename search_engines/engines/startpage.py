@@ -1,5 +1,3 @@
-from bs4 import BeautifulSoup
-
 from ..engine import SearchEngine
 from ..config import PROXY, TIMEOUT, FAKE_USER_AGENT
 from .. import output as out
@@ -25,16 +23,22 @@ class Startpage(SearchEngine):
         }
         return selectors[element]
     
-    def _first_page(self):
-        '''Returns the initial page and query.'''
+    def _bootstrap(self):
+        '''Returns the hidden inputs of the home page search form.'''
         response = self._get_page(self._base_url)
-        tags = BeautifulSoup(response.html, "html.parser")
+        tags = self._document(response)
         selector = self._selectors('search_form')
 
         data = {
             i['name']: i.get('value', '') 
-            for i in tags.select(selector)
+            for i in tags.select(selector) 
+            if i['name'] != 'query'
         }
+        return data or None
+    
+    def _first_page(self):
+        '''Returns the initial page and query.'''
+        data = dict(self._session_state() or {})
         data['query'] = self._query
         url = self._base_url + '/sp/search'
         return {'url':url, 'data':data}
@@ -57,15 +61,15 @@ class Startpage(SearchEngine):
         return {'url':url, 'data':data}
     
     def _is_ok(self, response):
-        '''Checks if the HTTP response is 200 OK.'''
-        soup = BeautifulSoup(response.html, 'html.parser')
+        '''Checks if the HTTP response is 200 OK. 
+        Result pages aren't parsed here, so they can go to the parse executor.'''
         selector = self._selectors('blocked_form')
-        is_blocked = soup.select_one(selector)
+        is_blocked = 'blocked_feedback_form' in response.html and self._document(response).select_one(selector)
         
         self.is_banned = response.http in [403, 429, 503] or is_blocked
         
         if response.http == 200 and not is_blocked:
             return True
         msg = 'Banned' if is_blocked else ('HTTP ' + str(response.http)) if response.http else response.html
-        out.console(msg, level=out.Level.error)
+        self.progress.message(msg, level=out.Level.error)
         return False
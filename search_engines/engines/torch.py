@@ -9,7 +9,7 @@ class Torch(SearchEngine):
         super(Torch, self).__init__(proxy, timeout)
         self._base_url = u'http://torchdeedp3i2jigzjdmfpn5ttjhthh5wbmda2rr3jvqjg5p77c54dqd.onion'
         if not proxy:
-            out.console('Torch requires TOR proxy!', level=out.Level.warning)
+            self.progress.message('Torch requires TOR proxy!', level=out.Level.warning)
         self._current_page = 1
     
     def _selectors(self, element):
@@ -23,6 +23,10 @@ class Torch(SearchEngine):
         }
         return selectors[element]
     
+    def _reset(self):
+        '''Starts the next search at the first page.'''
+        self._current_page = 1
+    
     def _first_page(self):
         '''Returns the initial page and query.'''
         url_str = u'{}/search?query={}&action=search'
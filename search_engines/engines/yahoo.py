@@ -34,14 +34,13 @@ class Yahoo(SearchEngine):
         return {'url':url, 'data':None}
 
     def _get_url(self, link, item='href'):
-        selector = self._selectors('url')
-        url = self._get_tag_item(link.select_one(selector), 'href')
+        url = self._get_tag_item(self._select_field(link, 'url'), 'href')
         url = url.split(u'/RU=')[-1].split(u'/R')[0]
         return unquote_url(url)
 
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
-        title = tag.select_one(self._selectors('title'))
+        title = self._select_field(tag, 'title')
         for span in title.select('span'):
             span.decompose()
         return self._get_tag_item(title, item)
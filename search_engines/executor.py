@@ -0,0 +1,101 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from time import time
+
+
+_PLAIN = (str, bytes, int, float, bool, type(None))
+
+
+class ParseExecutor(object):
+    '''Parses result pages in worker processes, so concurrent searches aren't
+    limited to one core by the GIL.
+
+    An engine's page body and its plain-data attributes (query, filters, page
+    offsets etc.) go to a worker. The worker parses the page, runs
+    `_filter_results` and `_next_page`, and returns the result items, the next
+    page request and the attributes those hooks changed. The items are collected
+    by the engine, so the results are the same as those of the in-thread path.
+    Each worker keeps an instance of every engine class it has parsed pages for.
+    '''
+    def __init__(self, max_workers=None):
+        '''
+        :param int max_workers: optional, the number of processes (default: the number of CPUs)
+        '''
+        self.max_workers = max_workers
+        self._pool = ProcessPoolExecutor(max_workers)
+
+    def submit(self, engine, html):
+        '''Starts parsing a result page of an engine. Returns a Future of a ParsedPage.'''
+        cls = engine.__class__
+        state = engine_state(engine)
+        return self._pool.submit(parse_page, cls.__module__, cls.__name__, state, html)
+
+    def parse(self, engine, html):
+        '''Parses a result page of an engine and updates the engine's state.
+
+        :param engine: SearchEngine The engine
+        :param html: str The page body
+        :returns ParsedPage
+        '''
+        parsed = self.submit(engine, html).result()
+        for name, value in parsed.state.items():
+            setattr(engine, name, value)
+        return parsed
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+ParsedPage = namedtuple('ParsedPage', ['items', 'request', 'state', 'timing'])
+'''What a worker returns: the result items, the next page request, 
+the changed engine attributes and the parse and extract timings.'''
+
+
+def engine_state(engine):
+    '''Returns the attributes of an engine that are plain data and can be sent to a worker.'''
+    return {k: v for k, v in vars(engine).items() if _is_plain(v)}
+
+def parse_page(module, cls, state, html):
+    '''Parses a result page in a worker process; see ParseExecutor.'''
+    engine = _engine(module, cls)
+    for name, value in state.items():
+        setattr(engine, name, value)
+    start = time()
+    tags = engine._parse(html)
+    parsed = time()
+    items = engine._filter_results(tags)
+    extracted = time()
+    request = engine._next_page(tags)
+    changed = {k: v for k, v in engine_state(engine).items() if k in state and state[k] != v}
+    timing = {'parse': parsed - start, 'extract': extracted - parsed}
+    return ParsedPage(items, request, changed, timing)
+
+def _engine(module, cls):
+    '''Returns the worker's instance of an engine class.'''
+    key = (module, cls)
+    if key not in _engines:
+        engine = getattr(import_module(module), cls)()
+        engine.disable_console()
+        _engines[key] = engine
+    return _engines[key]
+
+def _is_plain(value):
+    '''Checks if a value is made of str, numbers, None, lists, tuples, sets and dicts.'''
+    if isinstance(value, _PLAIN):
+        return True
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(_is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(_is_plain(k) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+_engines = {}
+'''Engine instances of the worker process, by class.'''
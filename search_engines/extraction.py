@@ -0,0 +1,193 @@
+import re
+
+import soupsieve
+from bs4.element import Tag
+
+
+class ExtractionPlan(object):
+    '''The CSS selectors of an engine, compiled once on the engine's first page.
+    Finds the url, title and text elements of a result item in one pass over its tags.
+    '''
+    elements = ('links', 'url', 'title', 'text', 'next')
+    '''The selectors that are compiled.'''
+    fields = ('url', 'title', 'text')
+    '''The elements of a result item.'''
+
+    def __init__(self, selectors):
+        '''
+        :param selectors: dict The engine's selectors, by element
+        '''
+        self.selectors = selectors
+        self._matchers = {}
+        self._patterns = {}
+        for element, selector in selectors.items():
+            if not isinstance(selector, str):
+                continue
+            matcher = compile_selector(selector)
+            if matcher:
+                self._matchers[element] = matcher
+            else:
+                self._patterns[element] = soupsieve.compile(selector)
+
+        self._field_matchers = []
+        for field in self.fields:
+            if field not in self._matchers:
+                continue
+            same = [i for i in self._field_matchers if selectors[i[1][0]] == selectors[field]]
+            if same:
+                same[0][1].append(field)
+            else:
+                self._field_matchers.append((self._matchers[field], [field]))
+
+    @classmethod
+    def compile(cls, engine):
+        '''Creates the plan of a SearchEngine from its _selectors method.'''
+        selectors = {}
+        for element in cls.elements:
+            try:
+                selectors[element] = engine._selectors(element)
+            except (KeyError, NotImplementedError):
+                pass
+        return cls(selectors)
+
+    def select(self, tag, element):
+        '''Returns all the tags that match an element's selector.'''
+        if not isinstance(tag, Tag):
+            return tag.select(self.selectors[element])
+        if element in self._matchers:
+            match = self._matchers[element]
+            return [i for i in tag.descendants if isinstance(i, Tag) and match(i)]
+        if element in self._patterns:
+            return self._patterns[element].select(tag)
+        return tag.select(self.selectors[element])
+
+    def select_one(self, tag, element):
+        '''Returns the first tag that matches an element's selector.'''
+        if not isinstance(tag, Tag):
+            return tag.select_one(self.selectors[element])
+        if element in self._matchers:
+            match = self._matchers[element]
+            return next((i for i in tag.descendants if isinstance(i, Tag) and match(i)), None)
+        if element in self._patterns:
+            return self._patterns[element].select_one(tag)
+        return tag.select_one(self.selectors[element])
+
+    def find_fields(self, tag):
+        '''Returns the url, title and text tags of a result item, by field name.'''
+        found = {}
+        if not isinstance(tag, Tag):
+            for field in self.fields:
+                if isinstance(self.selectors.get(field), str):
+                    found[field] = tag.select_one(self.selectors[field])
+            return found
+
+        for field in self.fields:
+            if field in self._patterns:
+                found[field] = self._patterns[field].select_one(tag)
+        for _, fields in self._field_matchers:
+            found.update(dict.fromkeys(fields))
+
+        pending = list(self._field_matchers)
+        for child in tag.descendants:
+            if not pending:
+                break
+            if not isinstance(child, Tag):
+                continue
+            for item in pending[:]:
+                if item[0](child):
+                    found.update(dict.fromkeys(item[1], child))
+                    pending.remove(item)
+        return found
+
+
+_combinator = re.compile(r'\s*(>)\s*|\s+')
+_compound = re.compile(r'(\*|[a-zA-Z][\w-]*)?((?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)$')
+_component = re.compile(
+    r'#([\w-]+)|\.([\w-]+)|'
+    r'\[\s*([\w-]+)\s*(?:([\^$*]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]+))\s*)?\]'
+)
+
+def compile_selector(selector):
+    '''Compiles a CSS selector to a match function. Handles type, #id, .class and
+    [attr], [attr=v], [attr^=v], [attr$=v], [attr*=v] selectors joined by descendant
+    or child combinators; returns None for anything else.
+    '''
+    steps, combinator = [], u' '
+    for part in _combinator.split(selector.strip()):
+        if part is None:
+            continue
+        if part == u'>':
+            combinator = u'>'
+            continue
+        test = _compile_compound(part)
+        if test is None:
+            return None
+        steps.append((combinator, test))
+        combinator = u' '
+    if not steps or combinator == u'>':
+        return None
+
+    def match(tag, index=len(steps) - 1):
+        if not steps[index][1](tag):
+            return False
+        if index == 0:
+            return True
+        parent = tag.parent
+        if steps[index][0] == u'>':
+            return parent is not None and match(parent, index - 1)
+        while parent is not None:
+            if match(parent, index - 1):
+                return True
+            parent = parent.parent
+        return False
+    return match
+
+def _compile_compound(selector):
+    '''Compiles a compound selector (no combinators) to a test function.'''
+    parts = _compound.match(selector)
+    if not parts or not selector:
+        return None
+    name = parts.group(1) if parts.group(1) != u'*' else None
+    name = name.lower() if name else None
+    ids, classes, attrs = [], set(), []
+
+    rest = parts.group(2)
+    for component in _component.finditer(rest):
+        id_, class_, attr, op, *values = component.groups()
+        if id_:
+            ids.append(id_)
+        elif class_:
+            classes.add(class_)
+        else:
+            value = next((v for v in values if v is not None), None)
+            attrs.append((attr.lower(), op, value))
+    if u''.join(i.group(0) for i in _component.finditer(rest)) != rest:
+        return None
+
+    def test(tag):
+        if name and tag.name != name:
+            return False
+        tag_attrs = tag.attrs
+        for id_ in ids:
+            if tag_attrs.get('id') != id_:
+                return False
+        if classes and not classes.issubset(tag_attrs.get('class') or ()):
+            return False
+        for attr, op, value in attrs:
+            actual = tag_attrs.get(attr)
+            if actual is None:
+                return False
+            if not op:
+                continue
+            if isinstance(actual, list):
+                actual = u' '.join(actual)
+            if op == u'=' and actual != value:
+                return False
+            if op == u'^=' and not (value and actual.startswith(value)):
+                return False
+            if op == u'$=' and not (value and actual.endswith(value)):
+                return False
+            if op == u'*=' and not (value and value in actual):
+                return False
+        return True
+    return test
@@ -0,0 +1,133 @@
+from time import time
+from threading import Lock
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class EngineHealth(object):
+    '''Request statistics and circuit breaker of a search engine.
+    The breaker opens on a ban or after `failure_threshold` consecutive failures,
+    stays open for `cooldown` seconds, then lets requests through (half-open).
+    The first result closes it again or reopens it with a doubled cool-down.
+    '''
+    def __init__(self, name, failure_threshold=3, cooldown=60, max_cooldown=3600):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.bans = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        '''Moving average of the request latency, in seconds.'''
+        self._lock = Lock()
+
+    @property
+    def success_rate(self):
+        return float(self.successes) / self.requests if self.requests else None
+
+    def allow(self):
+        '''Checks if requests may be sent to the engine.'''
+        with self._lock:
+            if self.state == OPEN and time() >= self.opened_at + self.cooldown:
+                self.state = HALF_OPEN
+            return self.state != OPEN
+
+    def record(self, success, latency=None, banned=False):
+        '''Records the outcome of a request.
+
+        :param success: bool Indicates if the request succeeded
+        :param latency: float Optional, the request duration in seconds
+        :param banned: bool Optional, indicates if the engine banned us
+        '''
+        with self._lock:
+            self.requests += 1
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if success:
+                self.successes += 1
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    self.state = CLOSED
+                    self.cooldown = self.base_cooldown
+                return
+            self.failures += 1
+            self.bans += int(bool(banned))
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open(min(self.cooldown * 2, self.max_cooldown))
+            elif banned or self.consecutive_failures >= self.failure_threshold:
+                self._open(self.cooldown)
+
+    def reset(self):
+        '''Closes the breaker.'''
+        with self._lock:
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+            self.consecutive_failures = 0
+
+    def to_dict(self):
+        '''Returns the statistics as a dictionary.'''
+        return {
+            'state': self.state, 'requests': self.requests, 'successes': self.successes,
+            'failures': self.failures, 'bans': self.bans, 'success_rate': self.success_rate,
+            'latency': self.latency, 'cooldown': self.cooldown
+        }
+
+    def _open(self, cooldown):
+        self.state = OPEN
+        self.opened_at = time()
+        self.cooldown = cooldown
+
+
+class HealthScoreboard(object):
+    '''The health of every search engine, by engine name.'''
+    def __init__(self, failure_threshold=3, cooldown=60, max_cooldown=3600):
+        self._options = (failure_threshold, cooldown, max_cooldown)
+        self._engines = {}
+        self._lock = Lock()
+
+    def get(self, name):
+        '''Returns the EngineHealth of an engine.'''
+        name = name.lower()
+        with self._lock:
+            if name not in self._engines:
+                self._engines[name] = EngineHealth(name, *self._options)
+            return self._engines[name]
+
+    def allow(self, name):
+        '''Checks if the breaker of an engine lets requests through.'''
+        return self.get(name).allow()
+
+    def record(self, name, success, latency=None, banned=False):
+        '''Records the outcome of a request to an engine.'''
+        self.get(name).record(success, latency, banned)
+
+    def snapshot(self):
+        '''Returns the statistics of all engines.'''
+        with self._lock:
+            engines = list(self._engines.values())
+        return {e.name: e.to_dict() for e in engines}
+
+    def reset(self, name=None):
+        '''Closes the breaker of an engine, or all breakers.'''
+        if name:
+            engines = [self.get(name)]
+        else:
+            with self._lock:
+                engines = list(self._engines.values())
+        for engine in engines:
+            engine.reset()
+
+
+scoreboard = HealthScoreboard()
+'''The process-wide engine health scoreboard.'''
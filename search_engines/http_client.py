@@ -1,41 +1,249 @@
 import requests
-from collections import namedtuple
+from time import time, sleep
+from functools import partial, lru_cache
 
 from .config import TIMEOUT, PROXY, USER_AGENT
 from . import utils as utl
+from .ratelimit import limiter
+from .recording import Recorder, Replayer
+from .proxies import ProxyPool
 
 
 class HttpClient(object):
-    '''Performs HTTP requests. A `requests` wrapper, essentialy'''
+    '''Performs HTTP requests. A `requests` wrapper, essentialy.
+    The `a*` methods are awaitable; they use `aiohttp` when it's installed 
+    and fall back to running the `requests` calls in a worker thread.
+    Both paths can be recorded to an archive and replayed offline.
+    `proxy` may be a ProxyPool, to rotate the requests over a number of proxies.
+    '''
     def __init__(self, timeout=TIMEOUT, proxy=PROXY):
+        self.proxy_pool = proxy if isinstance(proxy, ProxyPool) else None
+        if self.proxy_pool is not None:
+            proxy = None
         self.session = requests.session()
         self.session.proxies = self._set_proxy(proxy)
         self.session.headers['User-Agent'] = USER_AGENT
         self.session.headers['Accept-Language'] = 'en-GB,en;q=0.5'
 
         self.timeout = timeout
-        self.response = namedtuple('response', ['http', 'html'])
+        self.response = Response
+        self._proxy = proxy
+        self.rate_limit = None
+        '''(rate, capacity) of the token bucket each host is throttled with; None disables it.'''
+        self.wait = sleep
+        '''Waits for the rate limit, given the seconds; returns True if the request should be 
+        dropped instead (e.g. the search was cancelled while waiting).'''
+        self._async_session = None
+        self._async_loop = None
+        self.recorder = None
+        self.replayer = None
+        self._session_states = {}
+        self.observer = None
+        '''A callable that receives the timings of every request, see `Response.timing`.'''
+        self.proxy_key = None
+        '''The key of the proxy pool's sticky strategy, e.g. the engine name (default: the host).'''
 
     def get(self, page):
         '''Submits a HTTP GET request.'''
-        page = self._quote(page)
-        try:
-            req = self.session.get(page, timeout=self.timeout)
-            self.session.headers['Referer'] = page
-        except requests.exceptions.RequestException as e:
-            return self.response(http=0, html=e.__doc__)
-        return self.response(http=req.status_code, html=req.text)
+        return self._request('GET', page)
     
     def post(self, page, data):
         '''Submits a HTTP POST request.'''
+        return self._request('POST', page, data)
+    
+    def record(self, path):
+        '''Writes every request and response to an archive (see `replay`).
+        
+        :param path: str The archive file, or None to stop recording
+        '''
+        if self.recorder is not None:
+            self.recorder.close()
+        self.recorder = Recorder(path) if path else None
+    
+    def replay(self, path, latency=None):
+        '''Serves the responses from a recorded archive instead of the network.
+        
+        :param path: str The archive file, or None to stop replaying
+        :param latency: float Optional, seconds each response is delayed, or 'recorded'
+        '''
+        self.replayer = Replayer(path, latency) if path else None
+    
+    def session_state(self, key):
+        '''Returns the state (form tokens etc.) stored for this session, or None if it expired.'''
+        state = self._session_states.get(key)
+        if state is None or state[0] < time():
+            return None
+        return state[1]
+    
+    def set_session_state(self, key, state, ttl):
+        '''Stores state obtained with this session, e.g. by an engine's bootstrap requests.
+        The cookies they set are kept by the session itself.
+        '''
+        self._session_states[key] = (time() + ttl, state)
+    
+    def clear_session_state(self, key=None):
+        '''Removes the stored state of a key, or all stored state.'''
+        if key is None:
+            self._session_states.clear()
+        else:
+            self._session_states.pop(key, None)
+    
+    def _request(self, method, page, data=None):
+        '''Submits a HTTP request, or replays it.'''
         page = self._quote(page)
+        if self.replayer is not None:
+            return self.response(*self.replayer.replay(method, page, data))
+
+        if self._throttle(page):
+            return self.response(http=0, html=u'Stopped while waiting for the rate limit')
+        timing = self._timing(method, page)
+        proxy = self._acquire_proxy(page, timing)
+        start = time()
         try:
-            req = self.session.post(page, data, timeout=self.timeout)
+            req = self.session.request(
+                method, page, data=data, timeout=self._timeout(proxy), 
+                proxies=proxy.proxies if proxy else None, stream=True
+            )
+            timing['ttfb'] = time() - start
+            timing['bytes'] = len(req.content)
+            timing['download'] = time() - start - timing['ttfb']
+            timing['retries'] = len(getattr(getattr(req.raw, 'retries', None), 'history', None) or ())
             self.session.headers['Referer'] = page
         except requests.exceptions.RequestException as e:
-            return self.response(http=0, html=e.__doc__)
-        return self.response(http=req.status_code, html=req.text)
-    
+            response = self.response(http=0, html=e.__doc__)
+        else:
+            response = self.response(http=req.status_code, html=req.text)
+        self._finish(timing, response, start)
+        self._release_proxy(proxy, response)
+        self._record(method, page, data, response, timing['total'])
+        return response
+
+    async def aget(self, page):
+        '''Submits a HTTP GET request asynchronously.'''
+        return await self._arequest('GET', page)
+
+    async def apost(self, page, data):
+        '''Submits a HTTP POST request asynchronously.'''
+        return await self._arequest('POST', page, data)
+
+    async def aclose(self):
+        '''Closes the asynchronous transport.'''
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+
+    async def _arequest(self, method, page, data=None):
+        '''Submits a HTTP request through aiohttp, or a worker thread if it isn't available.'''
+        import asyncio
+        if not self._is_async_capable():
+            request = partial(self._request, method, page, data)
+            return await asyncio.get_running_loop().run_in_executor(None, request)
+
+        page = self._quote(page)
+        if self.replayer is not None:
+            return self.response(*await self.replayer.areplay(method, page, data))
+
+        if self.rate_limit:
+            await limiter.aacquire(self._host(page), *self.rate_limit)
+        aiohttp = _aiohttp()
+        timing = self._timing(method, page)
+        proxy = self._acquire_proxy(page, timing)
+        start = time()
+        try:
+            async with self._get_async_session().request(
+                method, page, data=data, 
+                headers=dict(self.session.headers), 
+                cookies=self.session.cookies.get_dict(), 
+                proxy=proxy.url if proxy else self._proxy, 
+                timeout=aiohttp.ClientTimeout(total=self._timeout(proxy)), 
+                trace_request_ctx=timing
+            ) as req:
+                timing['ttfb'] = time() - start
+                body = await req.read()
+                timing['bytes'] = len(body)
+                timing['download'] = time() - start - timing['ttfb']
+                html = await req.text(errors='replace')
+                cookies = {k:v.value for k,v in req.cookies.items()}
+            requests.utils.add_dict_to_cookiejar(self.session.cookies, cookies)
+            self.session.headers['Referer'] = page
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            response = self.response(http=0, html=e.__doc__)
+        else:
+            response = self.response(http=req.status, html=html)
+        self._finish(timing, response, start)
+        self._release_proxy(proxy, response)
+        self._record(method, page, data, response, timing['total'])
+        return response
+
+    def _timing(self, method, page):
+        '''Returns a new request timings record.'''
+        return {
+            'method': method, 'url': page, 'status': 0, 'bytes': 0, 'retries': 0, 
+            'connect': None, 'ttfb': None, 'download': None, 'total': None, 'proxy': self._proxy
+        }
+
+    def _finish(self, timing, response, start):
+        '''Completes the timings of a request and hands them to the observer.'''
+        timing['status'] = response.http
+        timing['total'] = time() - start
+        response.timing = timing
+        if self.observer is not None:
+            self.observer(timing)
+
+    def _acquire_proxy(self, page, timing):
+        '''Returns the proxy pool's proxy for a request, or None without a pool.'''
+        if self.proxy_pool is None:
+            return None
+        proxy = self.proxy_pool.acquire(self.proxy_key or self._host(page))
+        timing['proxy'] = proxy.url
+        return proxy
+
+    def _release_proxy(self, proxy, response):
+        '''Records the outcome of a request in the proxy's health.'''
+        if proxy is not None:
+            self.proxy_pool.release(proxy, response.http, response.timing['total'])
+
+    def _timeout(self, proxy):
+        '''Returns the timeout of a request, adapted to the proxy's latency.'''
+        if proxy is None:
+            return self.timeout
+        return self.proxy_pool.timeout(proxy, self.timeout)
+
+    def _record(self, method, page, data, response, elapsed):
+        '''Adds an exchange to the archive, if recording.'''
+        if self.recorder is not None:
+            self.recorder.add(method, page, data, response, elapsed)
+
+    def _is_async_capable(self):
+        '''Checks if requests can go through aiohttp (no SOCKS proxy support).'''
+        if (self._proxy or '').startswith('socks') or (self.proxy_pool and self.proxy_pool.socks):
+            return False
+        return _aiohttp() is not None
+
+    def _get_async_session(self):
+        '''Returns the aiohttp session of the running event loop.'''
+        import asyncio
+        aiohttp = _aiohttp()
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_loop is not loop:
+            self._async_session = aiohttp.ClientSession(
+                cookie_jar=aiohttp.DummyCookieJar(), trace_configs=[_connect_trace()]
+            )
+            self._async_loop = loop
+        return self._async_session
+
+    def _throttle(self, page):
+        '''Waits until the rate limit allows a request to the page's host.
+        Returns True if the wait was interrupted, see `wait`.
+        '''
+        if self.rate_limit:
+            return limiter.acquire(self._host(page), *self.rate_limit, wait=self.wait)
+        return False
+
+    def _host(self, url):
+        '''Returns the host of a URL, the rate limiter key.'''
+        return requests.utils.urlparse(url).netloc.lower()
+
     def _quote(self, url):
         '''URL-encodes URLs.'''
         if utl.decode_bytes(utl.unquote_url(url)) == utl.decode_bytes(url):
@@ -50,3 +258,42 @@ class HttpClient(object):
             proxy = {'http':proxy, 'https':proxy}
         return proxy
 
+
+@lru_cache(maxsize=None)
+def _aiohttp():
+    '''Imports aiohttp on first use, so synchronous users don't pay for it.
+    Returns None if it isn't installed.'''
+    try:
+        import aiohttp
+    except ImportError:
+        return None
+    return aiohttp
+
+def _connect_trace():
+    '''Returns an aiohttp trace that stores the connect time in the request timings.'''
+    aiohttp = _aiohttp()
+    async def on_start(session, context, params):
+        context.trace_request_ctx['_connecting'] = time()
+
+    async def on_end(session, context, params):
+        timing = context.trace_request_ctx
+        timing['connect'] = time() - timing.pop('_connecting')
+
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(on_start)
+    trace.on_connection_create_end.append(on_end)
+    return trace
+
+
+class Response(object):
+    '''A HTTP response. Holds the parsed page once an engine has parsed it.'''
+    def __init__(self, http, html):
+        self.http = http
+        self.html = html
+        self.document = None
+        self.timing = None
+        '''Request timings in seconds (connect, ttfb, download, total), bytes, status, retries 
+        and proxy. The connect time is measured on the aiohttp transport only.'''
+
+    def __repr__(self):
+        return '<Response [{}]>'.format(self.http)
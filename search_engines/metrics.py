@@ -0,0 +1,156 @@
+import io
+import json
+from bisect import bisect_left
+from threading import Lock
+
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_SECONDS = 'search_engines_request_seconds'
+PAGE_SECONDS = 'search_engines_page_seconds'
+RESPONSES = 'search_engines_responses_total'
+RESPONSE_BYTES = 'search_engines_response_bytes_total'
+RETRIES = 'search_engines_retries_total'
+RESULTS = 'search_engines_results_total'
+
+
+class Histogram(object):
+    '''Counts observations in cumulative buckets, like Prometheus histograms.'''
+    def __init__(self, buckets=SECONDS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        '''Returns (upper bound, count) pairs, ending with '+Inf'.'''
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum, 'buckets': self.cumulative()}
+
+
+class Metrics(object):
+    '''Histograms and counters of request and page timings, labelled by engine.
+    Collectors added with `add_collector` receive every raw record.
+    '''
+    def __init__(self):
+        self.collectors = []
+        self._histograms = {}
+        self._counters = {}
+        self._lock = Lock()
+
+    def add_collector(self, callback):
+        '''Calls `callback(kind, engine, record)` for every 'request' and 'page' record.'''
+        self.collectors.append(callback)
+
+    def remove_collector(self, callback):
+        self.collectors.remove(callback)
+
+    def observe(self, name, value, **labels):
+        '''Adds an observation to a histogram.'''
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    def increment(self, name, value=1, **labels):
+        '''Adds to a counter.'''
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_request(self, engine, timing):
+        '''Records the timings of a HTTP request (see HttpClient).'''
+        for phase in ('connect', 'ttfb', 'download', 'total'):
+            if timing.get(phase) is not None:
+                self.observe(REQUEST_SECONDS, timing[phase], engine=engine, phase=phase)
+        self.increment(RESPONSES, engine=engine, status=str(timing['status']))
+        self.increment(RESPONSE_BYTES, timing['bytes'], engine=engine)
+        if timing.get('retries'):
+            self.increment(RETRIES, timing['retries'], engine=engine)
+        self._collect('request', engine, timing)
+
+    def record_page(self, engine, timing):
+        '''Records the parse or extract timings of a results page.'''
+        for phase in ('parse', 'extract'):
+            if timing.get(phase) is not None:
+                self.observe(PAGE_SECONDS, timing[phase], engine=engine, phase=phase)
+        if timing.get('results') is not None:
+            self.increment(RESULTS, timing['results'], engine=engine)
+        self._collect('page', engine, timing)
+
+    def snapshot(self):
+        '''Returns the metrics as a dictionary: {name: [{'labels', 'value' or histogram}]}.'''
+        data = {}
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                entry = dict(histogram.to_dict(), labels=dict(labels))
+                data.setdefault(name, []).append(entry)
+            for (name, labels), value in sorted(self._counters.items()):
+                data.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return data
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self):
+        '''Returns the metrics in the Prometheus text exposition format.'''
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for name in sorted(set(k[0] for k, _ in histograms)):
+            lines.append('# TYPE {} histogram'.format(name))
+            for (metric, labels), histogram in histograms:
+                if metric != name:
+                    continue
+                for bound, count in histogram.cumulative():
+                    le = labels + (('le', str(bound)),)
+                    lines.append('{}_bucket{} {}'.format(name, _labels(le), count))
+                lines.append('{}_sum{} {}'.format(name, _labels(labels), histogram.sum))
+                lines.append('{}_count{} {}'.format(name, _labels(labels), histogram.count))
+        for name in sorted(set(k[0] for k, _ in counters)):
+            lines.append('# TYPE {} counter'.format(name))
+            for (metric, labels), value in counters:
+                if metric == name:
+                    lines.append('{}{} {}'.format(name, _labels(labels), value))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, format='json'):
+        '''Writes the metrics to a file, as 'json' or 'prometheus' text.'''
+        data = self.to_prometheus() if format == 'prometheus' else self.to_json()
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
+
+    def reset(self):
+        '''Removes all the recorded metrics.'''
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def _collect(self, kind, engine, record):
+        for callback in self.collectors:
+            callback(kind, engine, record)
+
+
+def _labels(labels):
+    '''Formats Prometheus labels.'''
+    if not labels:
+        return ''
+    escape = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join('{}="{}"'.format(k, escape(v)) for k, v in labels) + '}'
+
+
+metrics = Metrics()
+'''The process-wide metrics.'''
@@ -1,16 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, TimeoutError as FuturesTimeoutError
+from time import time
+
 from .results import SearchResults
+from .progress import Progress
 from .engines import search_engines_dict
 from . import output as out
 from . import config as cfg
+from . import utils
 
 
 class MultipleSearchEngines(object):
     '''Uses multiple search engines.'''
     def __init__(self, engines, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
         self._engines = [
-            se(proxy, timeout) 
-            for se in search_engines_dict.values() 
-            if se.__name__.lower() in engines
+            search_engines_dict[name](proxy, timeout) 
+            for name in search_engines_dict 
+            if name in engines
         ]
         self._filter = None
 
@@ -18,57 +23,143 @@ class MultipleSearchEngines(object):
         self.ignore_duplicate_domains = False
         self.results = SearchResults()
         self.banned_engines = []
+
+        self.max_workers = 1
+        '''Number of engines searched in parallel (1 searches them one after another).'''
+        self.engine_deadline = None
+        '''Seconds each engine may spend on a query; partial results are kept.'''
+        self.deadline = None
+        '''Seconds the whole query may take; engines still running are dropped.'''
+        self.first_n = None
+        '''Cancels the slower engines once this many results have been merged.'''
+        self.sinks = []
+        '''`output.ResultSink` objects the results of each engine are written to as they're merged.'''
+        self.progress = Progress(self.__class__.__name__)
+        '''Reports the messages of the multi-engine search; each engine has its own.'''
+        self._running = {}
+        '''The searches of dropped engines that are still stopping, by engine.'''
+        self._reported = []
+        '''The engines whose results belong to the last query: the merged and the skipped ones.'''
     
     def disable_console(self):
-        '''Disables console output'''
-        out.console = lambda msg, end='\n', level=None: None
+        '''Disables the console output of this search and its engines'''
+        self.progress.console = False
+        for engine in self._engines:
+            engine.disable_console()
     
     def set_search_operator(self, operator):
         '''Filters search results based on the operator.'''
         self._filter = operator
     
     def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
-        '''Searches multiples engines and collects the results.'''
+        '''Searches multiples engines and collects the results.
+        Engines run on a pool of `max_workers` threads and their results 
+        are merged in the order the engines finish.
+        '''
         self.results = SearchResults()
+        engines = self._available_engines()
+        self._reported = [engine for engine in self._engines if engine not in engines]
+        for engine in self._reported:
+            engine._query = utils.decode_bytes(query)
+        self._wait_running(engines)
+        for engine in engines:
+            engine._cancelled.clear()
+        end = (time() + self.deadline) if self.deadline else None
+        pool = ThreadPoolExecutor(max_workers=max(1, self.max_workers))
+        futures = {
+            pool.submit(self._search_engine, engine, query, pages, end): engine 
+            for engine in engines
+        }
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                self._merge(futures[future], future.result())
+                if self.first_n and len(self.results) >= self.first_n:
+                    break
+        except FuturesTimeoutError:
+            self.progress.message('Search deadline exceeded', level=out.Level.warning)
+        finally:
+            for future, engine in futures.items():
+                if not future.done() and not future.cancel():
+                    engine.cancel()
+                    self._running[engine] = future
+            pool.shutdown(wait=False)
+        return self.results
+    
+    def _wait_running(self, engines):
+        '''Waits until the cancelled searches of previous queries stop using the engines,
+        so an engine instance is never driven by two searches at once.
+        '''
+        futures = [self._running.pop(engine) for engine in engines if engine in self._running]
+        wait(futures)
+    
+    def _available_engines(self):
+        '''Returns the engines whose circuit breaker is closed; the rest count as banned.'''
+        engines = []
         for engine in self._engines:
-            engine.ignore_duplicate_urls = self.ignore_duplicate_urls
-            engine.ignore_duplicate_domains = self.ignore_duplicate_domains
-            if self._filter:
-                engine.set_search_operator(self._filter)
-            
-            engine_results = engine.search(query, pages)
-            if engine.ignore_duplicate_urls:
-                engine_results._results = [
-                    item for item in engine_results._results 
-                    if item['link'] not in self.results.links()
-                ]
-            if self.ignore_duplicate_domains:
-                engine_results._results = [
-                    item for item in engine_results._results 
-                    if item['host'] not in self.results.hosts()
-                ]
-            self.results._results += engine_results._results
-
-            if engine.is_banned:
+            if engine.is_available():
+                engines.append(engine)
+                continue
+            engine.results = SearchResults()
+            msg = '{} skipped, circuit breaker is open'.format(engine.__class__.__name__)
+            self.progress.message(msg, level=out.Level.warning)
+            if engine.__class__.__name__ not in self.banned_engines:
                 self.banned_engines.append(engine.__class__.__name__)
-        return self.results
+        return engines
+    
+    def _search_engine(self, engine, query, pages, end=None):
+        '''Searches a single engine within the deadlines.'''
+        engine.ignore_duplicate_urls = self.ignore_duplicate_urls
+        engine.ignore_duplicate_domains = self.ignore_duplicate_domains
+        if self._filter:
+            engine.set_search_operator(self._filter)
+        
+        deadlines = [d for d in (end, self.engine_deadline and time() + self.engine_deadline) if d]
+        engine._deadline = min(deadlines) if deadlines else None
+        try:
+            return engine.search(query, pages)
+        finally:
+            engine._deadline = None
+    
+    def _merge(self, engine, engine_results):
+        '''Adds the results of an engine to the collected results.'''
+        items = list(engine_results)
+        if engine.ignore_duplicate_urls:
+            items = [item for item in items if not self.results.contains_link(item['link'])]
+        if self.ignore_duplicate_domains:
+            items = [item for item in items if not self.results.contains_host(item['host'])]
+        if len(items) < len(engine_results):
+            engine.results = SearchResults(items)
+        self.results.extend(items)
+        self._reported.append(engine)
+        for sink in self.sinks:
+            sink.write(engine._query, engine.__class__.__name__, items)
+
+        if engine.is_banned:
+            self.banned_engines.append(engine.__class__.__name__)
     
     def output(self, output=out.PRINT, path=None):
-        '''Prints search results and/or creates report files.'''
-        output = (output or '').lower()
-        query = self._engines[0]._query if self._engines else u''
+        '''Prints search results and/or creates report files.
+        Formats already written by `sinks` are skipped. Engines dropped by `first_n` 
+        or the deadline aren't reported, their results weren't merged.
+        '''
+        formats = out.output_formats(output)
+        streamed = [sink.format for sink in self.sinks]
+        engines = [engine for engine in self._engines if engine in self._reported]
+        query = engines[0]._query if engines else u''
         if not path:
             path = cfg.OUTPUT_DIR + u'_'.join(query.split())
         out.console('')
 
-        if out.PRINT in output:
-            out.print_results(self._engines)
-        if out.HTML in output:
-            out.write_file(out.create_html_data(self._engines), path + u'.html') 
-        if out.CSV in output:
-            out.write_file(out.create_csv_data(self._engines), path + u'.csv') 
-        if out.JSON in output:
-            out.write_file(out.create_json_data(self._engines), path + u'.json')
+        if out.PRINT in formats:
+            out.print_results(engines)
+        if out.HTML in formats:
+            out.write_html(engines, path + u'.html') 
+        if out.CSV in formats and out.CSV not in streamed:
+            out.write_file(out.create_csv_data(engines), path + u'.csv') 
+        if out.JSON in formats:
+            out.write_file(out.create_json_data(engines), path + u'.json')
+        if out.JSONL in formats and out.JSONL not in streamed:
+            out.write_jsonl(engines, path + u'.jsonl')
 
 
 class AllSearchEngines(MultipleSearchEngines):
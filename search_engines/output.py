@@ -3,8 +3,11 @@ from __future__ import print_function
 import csv
 import json
 import io
+import os
 import re
 from collections import namedtuple
+from threading import Lock
+from time import time
 
 try:
     from shutil import get_terminal_size
@@ -13,7 +16,7 @@ except ImportError:
     
 from .utils import encode_str, decode_bytes
 from .libs import windows_cmd_encoding
-from .config import PYTHON_VERSION
+from .config import PYTHON_VERSION, HTML_REPORT_PAGE_ROWS
 
 
 def print_results(search_engines):
@@ -43,7 +46,7 @@ def create_csv_data(search_engines):
 def create_json_data(search_engines):
     '''JSON formats the search results.'''
     jobj = {
-        u'query': search_engines[0]._query, 
+        u'query': _report_query(search_engines), 
         u'results': {
             se.__class__.__name__: [i for i in se.results] 
             for se in search_engines
@@ -53,29 +56,34 @@ def create_json_data(search_engines):
 
 def create_html_data(search_engines):
     '''HTML formats the search results.'''
-    query = decode_bytes(search_engines[0]._query) if search_engines else u''
-    tables = u''
+    report = io.StringIO()
+    HtmlReport(report, _report_query(search_engines)).write_engines(search_engines).close()
+    return report.getvalue()
 
-    for engine in search_engines:
-        rows = u''
-        for i, v in enumerate(engine.results, 1):
-            data = u''
-            if u'title' in engine._filters:
-                data += HtmlTemplate.data.format(_replace_with_bold(query, v['title']))
-            if u'text' in engine._filters:
-                data += HtmlTemplate.data.format(_replace_with_bold(query, v['text']))
-            link = _replace_with_bold(query, v['link']) if u'url' in engine._filters else v['link']
-            rows += HtmlTemplate.row.format(number=i, href=v['link'], link=link, data=data)
-        
-        engine_name = engine.__class__.__name__
-        tables += HtmlTemplate.table.format(engine=engine_name, rows=rows)
-    return HtmlTemplate.html.format(query=query, table=tables)
+def write_html(search_engines, path, page_rows=HTML_REPORT_PAGE_ROWS, encoding='utf-8'):
+    '''Writes a HTML report, row by row. Reports over `page_rows` rows are 
+    split into linked pages: path, then path with "_2", "_3"... before the extension.
+    '''
+    try:
+        report = HtmlReport(path, _report_query(search_engines), page_rows, encoding)
+        report.write_engines(search_engines).close()
+        console(u'Output file: ' + path + (u' ({} pages)'.format(report.page) if report.page > 1 else u''))
+    except IOError as e:
+        console(e, level=Level.error)
+
+def _report_query(search_engines):
+    return decode_bytes(search_engines[0]._query) if search_engines else u''
+
+def _highlighter(query):
+    '''Returns a function that places the query in <b> tags, case-insensitively.'''
+    if not query:
+        return lambda data: data
+    pattern = re.compile(re.escape(query), re.I)
+    return lambda data: pattern.sub(lambda match: u'<b>{}</b>'.format(match.group(0)), data)
 
 def _replace_with_bold(query, data):
     '''Places the query in <b> tags.'''
-    for match in re.findall(query, data, re.I):
-        data = data.replace(match, u'<b>{}</b>'.format(match))
-    return data
+    return _highlighter(query)(data)
 
 
 def write_file(data, path, encoding='utf-8'):
@@ -97,13 +105,60 @@ def write_file(data, path, encoding='utf-8'):
         console(e, level=Level.error)
 
 
+def write_jsonl(search_engines, path, encoding='utf-8'):
+    '''Writes search results to a JSON lines file.'''
+    try:
+        with JsonlSink(path, encoding=encoding) as sink:
+            for engine in search_engines:
+                sink.write(engine._query, engine.__class__.__name__, engine.results)
+        console(u'Output file: ' + path)
+    except IOError as e:
+        console(e, level=Level.error)
+
+def output_formats(output):
+    '''Returns the formats named in an output string, e.g. "html,csv".'''
+    output = (output or '').lower()
+    formats = []
+    for name in (JSONL, PRINT, HTML, CSV, JSON):
+        if name in output:
+            formats.append(name)
+            output = output.replace(name, '')
+    return formats
+
+def open_sinks(output, path, flush_rows=1, fsync=False, mode='w'):
+    '''Opens a sink for each streamable format (csv, jsonl) named in `output`.
+    
+    :param output: str The output formats
+    :param path: str The file path, without extension
+    :param flush_rows: int Optional, see ResultSink
+    :param fsync: bool Optional, see ResultSink
+    :param mode: str Optional, 'w' to truncate the files, 'a' to append
+    :returns list of ResultSink objects
+    '''
+    sinks = []
+    for name in output_formats(output):
+        if name in SINKS:
+            sinks.append(SINKS[name](path + u'.' + name, flush_rows, fsync, mode))
+    return sinks
+
+
 def console(msg, end='\n', level=None):
     '''Prints data on the console.'''
-    console_len = get_terminal_size().columns
-    clear_line = u'\r{}\r'.format(u' ' * (console_len - 1))
-    msg = clear_line + (level or u'') + msg
+    msg = _clear_line() + (level or u'') + msg
     print(msg, end=end)
 
+def _clear_line():
+    '''Returns the string that clears the console line. 
+    The terminal size is checked at most once per second.
+    '''
+    now = time()
+    if now - _terminal[0] > 1:
+        width = get_terminal_size().columns
+        _terminal[:] = [now, u'\r{}\r'.format(u' ' * (width - 1))]
+    return _terminal[1]
+
+_terminal = [0.0, u'']
+
 Level = namedtuple('Level', ['info', 'warning', 'error'])(
     info = u'INFO ',
     warning = u'WARNING ',
@@ -116,6 +171,206 @@ JSON = 'json'
 CSV = 'csv'
 
 
+JSONL = 'jsonl'
+
+
+class ResultSink(object):
+    '''Appends search results to a file as they are collected.
+    Rows are buffered and flushed once `flush_rows` rows are pending; with `fsync` 
+    every flush is also synced to disk, so a crash loses at most the pending rows.
+    '''
+    format = None
+
+    def __init__(self, path, flush_rows=1, fsync=False, mode='w', encoding='utf-8'):
+        '''
+        :param str path: the output file
+        :param int flush_rows: optional, the rows buffered before a flush
+        :param bool fsync: optional, syncs every flush to disk
+        :param str mode: optional, 'w' to truncate the file, 'a' to append
+        :param str encoding: optional, the file encoding
+        '''
+        self.path = path
+        self.flush_rows = flush_rows
+        self.fsync = fsync
+        self.rows = 0
+        '''Number of rows written.'''
+        self._pending = 0
+        self._lock = Lock()
+        self._file = io.open(path, mode, encoding=encoding, newline='')
+        if self._file.tell() == 0:
+            self._header()
+
+    def write(self, query, engine, items):
+        '''Writes the results of a page.
+
+        :param query: str The search query
+        :param engine: str The engine name
+        :param items: iterable of dict The result items
+        '''
+        with self._lock:
+            for item in items:
+                self._row(query, engine, item)
+                self.rows += 1
+                self._pending += 1
+            if self._pending >= self.flush_rows:
+                self._flush()
+
+    def flush(self):
+        '''Writes the buffered rows to the file.'''
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        '''Flushes and closes the file.'''
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _header(self):
+        '''Writes the file header, if the format has one.'''
+
+    def _row(self, query, engine, item):
+        raise NotImplementedError()
+
+    def _flush(self):
+        if self._pending:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        self._pending = 0
+
+
+class CsvSink(ResultSink):
+    '''Streams search results to a CSV file, in the create_csv_data format.'''
+    format = CSV
+
+    def __init__(self, *args, **kwargs):
+        self._writer = None
+        super(CsvSink, self).__init__(*args, **kwargs)
+
+    def _header(self):
+        self._csv().writerow(['query', 'engine', 'domain', 'URL', 'title', 'text'])
+
+    def _row(self, query, engine, item):
+        self._csv().writerow([query, engine, item['host'], item['link'], item['title'], item['text']])
+
+    def _csv(self):
+        if self._writer is None:
+            self._writer = csv.writer(self._file)
+        return self._writer
+
+
+class JsonlSink(ResultSink):
+    '''Streams search results to a JSON lines file, an object per result.'''
+    format = JSONL
+
+    def _row(self, query, engine, item):
+        row = {u'query': query, u'engine': engine}
+        row.update(item)
+        self._file.write(json.dumps(row) + u'\n')
+
+
+SINKS = {CSV: CsvSink, JSONL: JsonlSink}
+'''Sink classes by output format.'''
+
+
+class HtmlReport(object):
+    '''Renders search results to HTML, writing each row as it's formatted.'''
+    def __init__(self, path, query, page_rows=None, encoding='utf-8'):
+        '''
+        :param path: str The output file, or a file-like object (never split into pages)
+        :param query: str The search query, highlighted in the filtered fields
+        :param page_rows: int Optional, rows per page (None: a single page)
+        :param encoding: str Optional, the file encoding
+        '''
+        self.path = path
+        self.query = query
+        self.page_rows = page_rows if isinstance(path, str) else None
+        self.encoding = encoding
+        self.page = 0
+        self._highlight = _highlighter(query)
+        self._head, self._tail = HtmlTemplate.html.split(u'{table}')
+        self._table_head, self._table_tail = HtmlTemplate.table.split(u'{rows}')
+        self._file = None
+        self._rows = 0
+        self._table = None
+        self._open_page()
+
+    def write_engines(self, search_engines):
+        '''Writes a table of results for each engine.'''
+        for engine in search_engines:
+            self.write_engine(engine)
+        return self
+
+    def write_engine(self, engine):
+        '''Writes the results table of an engine.'''
+        filters = engine._filters
+        highlight = self._highlight
+        self._table = engine.__class__.__name__
+        self._file.write(self._table_head.format(engine=self._table))
+
+        for i, v in enumerate(engine.results, 1):
+            if self.page_rows and self._rows >= self.page_rows:
+                self._next_page()
+            data = u''
+            if u'title' in filters:
+                data += HtmlTemplate.data.format(highlight(v['title']))
+            if u'text' in filters:
+                data += HtmlTemplate.data.format(highlight(v['text']))
+            link = highlight(v['link']) if u'url' in filters else v['link']
+            self._file.write(HtmlTemplate.row.format(number=i, href=v['link'], link=link, data=data))
+            self._rows += 1
+
+        self._file.write(self._table_tail.format())
+        self._table = None
+        return self
+
+    def close(self):
+        '''Ends the report.'''
+        self._close_page()
+
+    def _page_path(self, page):
+        if page == 1:
+            return self.path
+        name, ext = os.path.splitext(self.path)
+        return u'{}_{}{}'.format(name, page, ext)
+
+    def _open_page(self):
+        self.page += 1
+        self._rows = 0
+        if isinstance(self.path, str):
+            self._file = io.open(self._page_path(self.page), 'w', encoding=self.encoding, newline='')
+        else:
+            self._file = self.path
+        self._file.write(self._head.format(query=self.query))
+        if self.page > 1:
+            href = os.path.basename(self._page_path(self.page - 1))
+            self._file.write(HtmlTemplate.nav.format(href=href, text=u'Previous page'))
+
+    def _close_page(self, has_next=False):
+        if has_next:
+            href = os.path.basename(self._page_path(self.page + 1))
+            self._file.write(HtmlTemplate.nav.format(href=href, text=u'Next page'))
+        self._file.write(self._tail.format())
+        if self._file is not self.path:
+            self._file.close()
+
+    def _next_page(self):
+        '''Continues the current table on a new page.'''
+        table = self._table
+        self._file.write(self._table_tail.format())
+        self._close_page(has_next=True)
+        self._open_page()
+        self._file.write(self._table_head.format(engine=table))
+
+
 class HtmlTemplate:
     '''HTML template.'''
     html = u'''<html>
@@ -154,4 +409,6 @@ class HtmlTemplate:
     </tr>
     '''
     data = u'''<tr><td></td><td>{}</td></tr>'''
+    nav = u'''<p><a href="{href}">{text}</a></p>
+    '''
 
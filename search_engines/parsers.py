@@ -0,0 +1,151 @@
+import json
+
+from bs4 import BeautifulSoup
+
+from . import config as cfg
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser, SelectolaxError
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+HTML_PARSER = 'html.parser'
+LXML = 'lxml'
+LEXBOR = 'lexbor'
+
+
+def parse(html, backend=None):
+    '''Parses a HTML page with the requested backend.
+    Falls back to BeautifulSoup's html.parser if the backend isn't installed.
+
+    :param html: str The HTML page
+    :param backend: str Optional, 'html.parser', 'lxml' or 'lexbor' (default: config.HTML_PARSER)
+    :returns BeautifulSoup or LexborTag object
+    '''
+    backend = backend or cfg.HTML_PARSER
+    if backend == LEXBOR and LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        return LexborTag(tree.root or tree, html)
+    if backend == LXML and lxml is not None:
+        return BeautifulSoup(html, LXML)
+    return BeautifulSoup(html, HTML_PARSER)
+
+def parse_json(text):
+    '''Decodes a JSON response, with orjson if it's installed. 
+    Returns an empty dict if the response isn't valid JSON.
+    '''
+    try:
+        return orjson.loads(text) if orjson is not None else json.loads(text)
+    except ValueError:
+        return {}
+
+def available_parsers():
+    '''Returns the names of the installed backends.'''
+    parsers = [HTML_PARSER]
+    if lxml is not None:
+        parsers.append(LXML)
+    if LexborHTMLParser is not None:
+        parsers.append(LEXBOR)
+    return parsers
+
+
+class LexborTag(object):
+    '''Wraps selectolax (lexbor) nodes in the subset of the BeautifulSoup Tag API
+    the engines use. Selectors that lexbor can't handle are run by BeautifulSoup.
+    Like BeautifulSoup, an element's selectors only match its descendants; lexbor 
+    also matches the element itself.
+    '''
+    def __init__(self, node, html=None):
+        '''
+        :param node: the selectolax node
+        :param str html: optional, the page, if the node is the root of the document
+        '''
+        self._node = node
+        self._html = html
+        self._soup = None
+
+    def select(self, selector):
+        '''Returns all the elements that match the CSS selector.'''
+        try:
+            return [LexborTag(node) for node in self._descendants(self._node.css(selector))]
+        except SelectolaxError:
+            return self._fallback().select(selector)
+
+    def select_one(self, selector):
+        '''Returns the first element that matches the CSS selector.'''
+        try:
+            node = self._node.css_first(selector)
+            if node is not None and self._is_self(node):
+                node = next(iter(self._descendants(self._node.css(selector))), None)
+        except SelectolaxError:
+            return self._fallback().select_one(selector)
+        return LexborTag(node) if node is not None else None
+
+    def get(self, key, default=None):
+        '''Returns an attribute value.'''
+        return self.attrs.get(key, default)
+
+    def get_text(self, separator=u'', strip=False):
+        '''Returns the text of the element.'''
+        return self._node.text(deep=True, separator=separator, strip=strip)
+
+    def decompose(self):
+        '''Removes the element from the tree.'''
+        self._node.decompose()
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    @property
+    def attrs(self):
+        attrs = {k: (v or u'') for k, v in self._node.attributes.items()}
+        if 'class' in attrs:
+            attrs['class'] = attrs['class'].split()
+        return attrs
+
+    @property
+    def stripped_strings(self):
+        for node in self._node.traverse(include_text=True):
+            if node.tag == '-text':
+                text = node.text(deep=False).strip()
+                if text:
+                    yield text
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def _is_self(self, node):
+        '''Checks if a matched node is the element, not one of its descendants.'''
+        return self._html is None and node.mem_id == self._node.mem_id
+
+    def _descendants(self, nodes):
+        '''Drops the element itself from the matched nodes.'''
+        return [node for node in nodes if not self._is_self(node)]
+
+    def _fallback(self):
+        '''Returns a BeautifulSoup tree of the element, for unsupported selectors.
+        The element's own Tag is returned, so only its descendants are matched.
+        '''
+        if self._soup is None:
+            if self._html is not None:
+                self._soup = BeautifulSoup(self._html, HTML_PARSER)
+            else:
+                self._soup = BeautifulSoup(self._node.html, HTML_PARSER).find()
+        return self._soup
@@ -0,0 +1,90 @@
+from collections import namedtuple
+from threading import Lock
+from time import time
+
+from . import output as out
+
+
+START = 'start'
+PAGE = 'page'
+DONE = 'done'
+MESSAGE = 'message'
+
+
+ProgressEvent = namedtuple(
+    'ProgressEvent', ['kind', 'engine', 'query', 'page', 'links', 'elapsed', 'message', 'level']
+)
+'''A search progress event. `kind` is START, PAGE, DONE or MESSAGE.'''
+
+
+class Progress(object):
+    '''Reports the progress of an engine's searches to its subscribers and the console.
+    Progress lines are redrawn at most once per `interval` seconds across the
+    process, so concurrent searches don't flood the terminal.
+    '''
+    _drawn = [0.0]
+    _lock = Lock()
+
+    def __init__(self, engine, console=True, interval=0.2):
+        '''
+        :param str engine: the engine name
+        :param bool console: optional, prints progress on the console
+        :param float interval: optional, the minimum seconds between progress redraws
+        '''
+        self.engine = engine
+        self.console = console
+        self.interval = interval
+        self.subscribers = []
+        self._query = u''
+        self._started = None
+
+    def subscribe(self, callback):
+        '''Calls `callback(event)` with every ProgressEvent.'''
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def start(self, query):
+        '''Reports the start of a search.'''
+        self._query = query
+        self._started = time()
+        self._emit(START)
+
+    def page(self, page, links):
+        '''Reports a collected results page.'''
+        self._emit(PAGE, page, links)
+
+    def done(self, page=0, links=0):
+        '''Reports the end of a search.'''
+        self._emit(DONE, page, links)
+
+    def message(self, msg, level=None):
+        '''Reports a message, e.g. an error.'''
+        self._emit(MESSAGE, message=msg, level=level)
+
+    def _emit(self, kind, page=0, links=0, message=None, level=None):
+        if not self.subscribers and not self.console:
+            return
+        elapsed = time() - self._started if self._started else 0.0
+        event = ProgressEvent(kind, self.engine, self._query, page, links, elapsed, message, level)
+        for callback in self.subscribers:
+            callback(event)
+        if self.console:
+            self._draw(event)
+
+    def _draw(self, event):
+        '''Prints an event on the console.'''
+        if event.kind == PAGE:
+            now = time()
+            with self._lock:
+                if now - self._drawn[0] < self.interval:
+                    return
+                self._drawn[0] = now
+            out.console('page: {:<8} links: {}'.format(event.page, event.links), end='')
+        elif event.kind == START:
+            out.console('Searching {}'.format(event.engine))
+        elif event.kind == DONE:
+            out.console('', end='')
+        else:
+            out.console(event.message, level=event.level)
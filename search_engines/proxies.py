@@ -0,0 +1,164 @@
+from itertools import count
+from threading import Lock
+
+from .health import EngineHealth, OPEN
+from . import utils as utl
+
+
+ROUND_ROBIN = 'round-robin'
+LEAST_LOADED = 'least-loaded'
+STICKY = 'sticky'
+STRATEGIES = (ROUND_ROBIN, LEAST_LOADED, STICKY)
+
+BAN_STATUSES = (403, 429, 503)
+'''Responses that mean the target banned the proxy's IP; the proxy is evicted at once.'''
+FAILURE_STATUSES = (0, 407, 502, 504)
+'''Responses that mean the proxy failed (connection errors and timeouts are 0).'''
+
+
+class Proxy(object):
+    '''A proxy server of a ProxyPool, with its health and the requests in flight.'''
+    def __init__(self, url, failure_threshold=3, cooldown=60, max_cooldown=3600):
+        if not utl.is_url(url):
+            raise ValueError('Invalid proxy format!')
+        self.url = url
+        self.proxies = {'http': url, 'https': url}
+        '''The proxies dictionary of `requests`. Each proxy gets connection pools of its own.'''
+        self.health = EngineHealth(url, failure_threshold, cooldown, max_cooldown)
+        '''Latency and failure statistics; the breaker is open while the proxy is evicted.'''
+        self.in_flight = 0
+
+    @property
+    def evicted(self):
+        return self.health.state == OPEN
+
+    @property
+    def readmitted_at(self):
+        '''The time the proxy gets another chance, if it's evicted.'''
+        return (self.health.opened_at or 0) + self.health.cooldown
+
+    def to_dict(self):
+        return dict(self.health.to_dict(), url=self.url, in_flight=self.in_flight)
+
+
+class ProxyPool(object):
+    '''Rotates requests over a number of proxy servers.
+
+    A proxy is evicted after `failure_threshold` consecutive failures, or at once
+    if the target bans it, for `cooldown` seconds. It's then readmitted on trial:
+    a success restores it, a failure evicts it for twice as long. If every proxy
+    is evicted, the one closest to readmission is used.
+
+    Strategies:
+    - 'round-robin': each request goes to the next proxy.
+    - 'least-loaded': the proxy with the fewest requests in flight, then the fastest.
+    - 'sticky': each key (e.g. an engine) keeps its proxy until it's evicted.
+    '''
+    def __init__(
+        self, proxies, strategy=ROUND_ROBIN, failure_threshold=3, cooldown=60,
+        max_cooldown=3600, max_extra_timeout=10
+    ):
+        '''
+        :param proxies: iterable of str The proxy servers (protocol://ip:port)
+        :param strategy: str Optional, 'round-robin', 'least-loaded' or 'sticky'
+        :param failure_threshold: int Optional, the consecutive failures that evict a proxy
+        :param cooldown: int Optional, the seconds a proxy is evicted for at first
+        :param max_cooldown: int Optional, the longest eviction, in seconds
+        :param max_extra_timeout: int Optional, the most seconds a proxy adds to the HTTP timeout
+        '''
+        if strategy not in STRATEGIES:
+            raise ValueError('Unknown proxy strategy: ' + strategy)
+        self.strategy = strategy
+        self.max_extra_timeout = max_extra_timeout
+        self._options = (failure_threshold, cooldown, max_cooldown)
+        self._proxies = []
+        self._sticky = {}
+        self._cursor = count()
+        self._lock = Lock()
+        for url in proxies:
+            self.add(url)
+        if not self._proxies:
+            raise ValueError('The proxy pool needs at least one proxy')
+
+    def __len__(self):
+        return len(self._proxies)
+
+    def __iter__(self):
+        return iter(list(self._proxies))
+
+    @property
+    def socks(self):
+        '''Indicates if any of the proxies is a SOCKS proxy.'''
+        return any(p.url.startswith('socks') for p in self._proxies)
+
+    def add(self, url):
+        '''Adds a proxy server to the pool.'''
+        proxy = Proxy(url, *self._options)
+        with self._lock:
+            self._proxies.append(proxy)
+        return proxy
+
+    def remove(self, url):
+        '''Removes a proxy server from the pool.'''
+        with self._lock:
+            self._proxies = [p for p in self._proxies if p.url != url]
+            self._sticky = {k: p for k, p in self._sticky.items() if p.url != url}
+
+    def acquire(self, key=None):
+        '''Returns the proxy for the next request and counts it in flight.
+        Every acquired proxy must be released.
+
+        :param key: str Optional, the key of the sticky strategy
+        '''
+        with self._lock:
+            admitted = [p for p in self._proxies if p.health.allow()]
+            if not admitted:
+                admitted = [min(self._proxies, key=lambda p: p.readmitted_at)]
+            proxy = self._select(admitted, key)
+            proxy.in_flight += 1
+            return proxy
+
+    def release(self, proxy, status, latency=None):
+        '''Records the outcome of a request through a proxy.
+
+        :param proxy: Proxy The acquired proxy
+        :param status: int The HTTP status of the response, 0 if the request failed
+        :param latency: float Optional, the request duration in seconds
+        '''
+        banned = status in BAN_STATUSES
+        success = not banned and status not in FAILURE_STATUSES
+        with self._lock:
+            proxy.in_flight -= 1
+        proxy.health.record(success, latency if success else None, banned)
+
+    def timeout(self, proxy, timeout):
+        '''Returns the HTTP timeout of a request through a proxy: the direct timeout
+        plus three times the proxy's average latency, or `max_extra_timeout` seconds
+        while the latency is unknown.
+        '''
+        if proxy.health.latency is None:
+            return timeout + self.max_extra_timeout
+        return timeout + min(3 * proxy.health.latency, self.max_extra_timeout)
+
+    def stats(self):
+        '''Returns the statistics of every proxy.'''
+        return [p.to_dict() for p in self]
+
+    def _select(self, admitted, key):
+        if self.strategy == STICKY:
+            proxy = self._sticky.get(key)
+            if proxy not in admitted:
+                proxy = self._least_loaded(admitted)
+                self._sticky[key] = proxy
+            return proxy
+        if self.strategy == LEAST_LOADED:
+            return self._least_loaded(admitted)
+        if len(admitted) == 1:
+            return admitted[0]
+        while True:
+            proxy = self._proxies[next(self._cursor) % len(self._proxies)]
+            if proxy in admitted:
+                return proxy
+
+    def _least_loaded(self, admitted):
+        return min(admitted, key=lambda p: (p.in_flight, p.health.latency or 0))
@@ -0,0 +1,163 @@
+import os
+import json
+from time import time, sleep
+from threading import Lock
+
+from . import config as cfg
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class TokenBucket(object):
+    '''A thread-safe token bucket. Callers reserve a token and wait for their turn,
+    so concurrent requests are spread evenly at `rate` per second.
+    '''
+    def __init__(self, rate, capacity=1):
+        '''
+        :param float rate: tokens added per second
+        :param int capacity: optional, the maximum burst
+        '''
+        self.rate = float(rate)
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time()
+        self._lock = Lock()
+
+    def reserve(self):
+        '''Takes a token and returns the seconds to wait before using it.'''
+        with self._lock:
+            self._tokens, self._updated = self._take(self._tokens, self._updated)
+            return self._wait(self._tokens)
+
+    def configure(self, rate, capacity=1):
+        '''Changes the rate and the burst; the tokens saved up are kept, up to the new burst.'''
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = capacity
+            self._tokens = min(self._tokens, float(capacity))
+
+    def acquire(self, wait=sleep):
+        '''Waits for a token. Returns what `wait` returns.
+
+        :param wait: callable Optional, waits for the given seconds, e.g. until a search is cancelled
+        '''
+        return wait(self.reserve())
+
+    async def aacquire(self):
+        '''Waits for a token without blocking the event loop.'''
+        import asyncio
+        await asyncio.sleep(self.reserve())
+
+    def _take(self, tokens, updated):
+        '''Refills the bucket and takes a token; returns the new state.'''
+        now = time()
+        tokens = min(self.capacity, tokens + max(0, now - updated) * self.rate)
+        return tokens - 1, now
+
+    def _wait(self, tokens):
+        '''Returns the seconds until a negative balance is paid back.'''
+        return -tokens / self.rate if tokens < 0 else 0
+
+
+class FileTokenBucket(TokenBucket):
+    '''A token bucket stored in a locked file, shared by all processes using the same path.'''
+    def __init__(self, path, rate, capacity=1):
+        '''
+        :param str path: the state file
+        :param float rate: tokens added per second
+        :param int capacity: optional, the maximum burst
+        '''
+        super(FileTokenBucket, self).__init__(rate, capacity)
+        self.path = path
+
+    def reserve(self):
+        '''Takes a token and returns the seconds to wait before using it.'''
+        with self._lock, open(self.path, 'a+') as f:
+            self._lock_file(f)
+            try:
+                f.seek(0)
+                try:
+                    tokens, updated = json.loads(f.read())
+                except ValueError:
+                    tokens, updated = float(self.capacity), time()
+                tokens, updated = self._take(tokens, updated)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps([tokens, updated]))
+                f.flush()
+            finally:
+                self._unlock_file(f)
+        return self._wait(tokens)
+
+    def _lock_file(self, f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(self, f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class RateLimiter(object):
+    '''Token buckets by host, shared by every HttpClient in the process.
+    If a directory is set, the buckets are files in it and are shared across processes.
+    '''
+    def __init__(self, path=None):
+        '''
+        :param str path: optional, the bucket directory (default: config.RATE_LIMIT_DIR, 
+            read whenever a bucket is requested)
+        '''
+        self.path = path
+        self._buckets = {}
+        self._lock = Lock()
+
+    @property
+    def directory(self):
+        '''The bucket directory in use, or None for in-process buckets.'''
+        return self.path if self.path is not None else cfg.RATE_LIMIT_DIR
+
+    def bucket(self, host, rate, capacity=1):
+        '''Returns the bucket of a host, with the given rate and burst. 
+        The latest rate requested for a host applies; a bucket is recreated if 
+        the bucket directory has changed.
+        '''
+        directory = self.directory
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None or bucket[0] != directory:
+                bucket = (directory, self._create(directory, host, rate, capacity))
+                self._buckets[host] = bucket
+            elif (bucket[1].rate, bucket[1].capacity) != (float(rate), capacity):
+                bucket[1].configure(rate, capacity)
+            return bucket[1]
+
+    def acquire(self, host, rate, capacity=1, wait=sleep):
+        '''Waits until a request to the host is allowed. Returns what `wait` returns.'''
+        return self.bucket(host, rate, capacity).acquire(wait)
+
+    async def aacquire(self, host, rate, capacity=1):
+        '''Waits until a request to the host is allowed, without blocking the event loop.'''
+        await self.bucket(host, rate, capacity).aacquire()
+
+    def _create(self, directory, host, rate, capacity):
+        '''Returns a new bucket, stored in a file if there is a bucket directory.'''
+        if not directory:
+            return TokenBucket(rate, capacity)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        path = os.path.join(directory, host.replace(':', '_') + '.bucket')
+        return FileTokenBucket(path, rate, capacity)
+
+
+limiter = RateLimiter()
+'''The process-wide rate limiter.'''
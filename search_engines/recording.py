@@ -0,0 +1,160 @@
+import os
+import io
+import json
+import gzip
+import zlib
+import atexit
+from time import sleep
+from threading import Lock
+from collections import deque
+
+
+class Recorder(object):
+    '''Appends every request/response pair to a gzip-compressed JSON lines archive.
+    The archive is closed at exit if `close` isn't called. An archive left unclosed 
+    by a killed process is rewritten with its complete exchanges before appending.
+    '''
+    def __init__(self, path):
+        '''
+        :param str path: the archive file, created if it doesn't exist
+        '''
+        self.path = path
+        if os.path.exists(path) and not _is_complete(path):
+            _rewrite(path)
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._lock = Lock()
+        atexit.register(self.close)
+
+    def add(self, method, url, data, response, elapsed=None):
+        '''Stores an exchange.
+
+        :param method: str The HTTP method
+        :param url: str The requested URL
+        :param data: dict The post data, or None
+        :param response: Response The response
+        :param elapsed: float Optional, the request duration in seconds
+        '''
+        line = json.dumps({
+            'method': method, 'url': url, 'data': data,
+            'status': response.http, 'body': response.html, 'elapsed': elapsed
+        })
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        atexit.unregister(self.close)
+
+
+class Replayer(object):
+    '''Serves responses from a Recorder archive.
+    Repeated requests get their recorded responses in order, then the last one again.
+    '''
+    def __init__(self, path, latency=None):
+        '''
+        :param str path: the archive file
+        :param latency: float Optional, seconds each response is delayed, or
+            'recorded' to wait as long as the original request took
+        '''
+        self.path = path
+        self.latency = latency
+        self._exchanges = {}
+        self._lock = Lock()
+        for exchange in read_archive(path):
+            key = self.key(exchange['method'], exchange['url'], exchange['data'])
+            self._exchanges.setdefault(key, deque()).append(exchange)
+
+    def __len__(self):
+        return sum(len(i) for i in self._exchanges.values())
+
+    def find(self, method, url, data=None):
+        '''Returns the next recorded exchange of a request, or None.'''
+        with self._lock:
+            exchanges = self._exchanges.get(self.key(method, url, data))
+            if not exchanges:
+                return None
+            return exchanges.popleft() if len(exchanges) > 1 else exchanges[0]
+
+    def replay(self, method, url, data=None):
+        '''Returns the recorded (status, body) of a request after the simulated latency.'''
+        exchange = self.find(method, url, data)
+        sleep(self._latency(exchange))
+        return self._response(exchange, url)
+
+    async def areplay(self, method, url, data=None):
+        '''Returns the recorded (status, body) of a request, without blocking the event loop.'''
+        import asyncio
+        exchange = self.find(method, url, data)
+        await asyncio.sleep(self._latency(exchange))
+        return self._response(exchange, url)
+
+    def key(self, method, url, data=None):
+        '''Returns the lookup key of a request.'''
+        return json.dumps([method.upper(), url, sorted((data or {}).items())])
+
+    def _latency(self, exchange):
+        if self.latency == 'recorded':
+            return (exchange or {}).get('elapsed') or 0
+        return self.latency or 0
+
+    def _response(self, exchange, url):
+        if exchange is None:
+            return 0, u'Not in the replay archive: ' + url
+        return exchange['status'], exchange['body']
+
+
+def read_archive(path):
+    '''Yields the exchanges of an archive (dicts), in recorded order.
+    If the recorder wasn't closed (e.g. the process was killed), the archive has no
+    gzip trailer and may end with a partial line; the complete exchanges are read.
+    '''
+    with io.open(path, 'rb') as f:
+        rest = b''
+        for chunk in _decompress(f):
+            lines = (rest + chunk).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line.decode('utf-8'))
+        try:
+            if rest.strip():
+                yield json.loads(rest.decode('utf-8'))
+        except ValueError:
+            pass
+
+def _decompress(f, size=64 * 1024):
+    '''Yields the decompressed data of a gzip file, member after member. 
+    Stops at the end of a truncated member, or before a corrupt chunk.
+    '''
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    data = f.read(size)
+    while data:
+        try:
+            yield decompressor.decompress(data)
+        except zlib.error:
+            return
+        if decompressor.eof:
+            data = decompressor.unused_data or f.read(size)
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        else:
+            data = f.read(size)
+
+def _is_complete(path):
+    '''Checks if every gzip member of an archive is complete.'''
+    try:
+        with gzip.open(path, 'rb') as f:
+            while f.read(1024 * 1024):
+                pass
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        return False
+    return True
+
+def _rewrite(path):
+    '''Rewrites an archive with the exchanges that can be read.'''
+    exchanges = list(read_archive(path))
+    with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+        for exchange in exchanges:
+            f.write(json.dumps(exchange) + '\n')
+    os.replace(path + '.tmp', path)
@@ -1,41 +1,153 @@
 class SearchResults(object):
-    '''Stores the search results'''
+    '''Stores the search results.
+    Results are kept in columns (host, link, title, text) with interned hosts,
+    and handed out as dictionaries on access. `column` returns a column without copying it.
+    '''
+    __slots__ = ('_columns', '_hosts', '_index', '_rows_list')
+    fields = ('host', 'link', 'title', 'text')
+
     def __init__(self, items=None):
-        self._results = items or []
-    
+        self._columns = {field: [] for field in self.fields}
+        self._hosts = {}
+        self._index = {}
+        self._rows_list = None
+        self.extend(items or [])
+
     def links(self):
         '''Returns the links found in search results'''
-        return [row.get('link') for row in self._results]
-    
+        return list(self._columns['link'])
+
     def titles(self):
         '''Returns the titles found in search results'''
-        return [row.get('title') for row in self._results]
-    
+        return list(self._columns['title'])
+
     def text(self):
         '''Returns the text found in search results'''
-        return [row.get('text') for row in self._results]
-    
+        return list(self._columns['text'])
+
     def hosts(self):
         '''Returns the domains found in search results'''
-        return [row.get('host') for row in self._results]
-    
+        return list(self._columns['host'])
+
+    def column(self, field):
+        '''Returns a read-only view of a column ('host', 'link', 'title' or 'text'), 
+        without copying it. The view reflects results appended later.
+        '''
+        return ColumnView(self._columns[field])
+
     def results(self):
-        '''Returns all data found in search results'''
-        return self._results
-    
+        '''Returns all data found in search results.
+        The list is built on the first call and then kept up to date as results are appended.
+        '''
+        if self._rows_list is None:
+            self._rows_list = [self._row(i) for i in range(len(self))]
+        return self._rows_list
+
+    def contains_link(self, link):
+        '''Checks if a link is in the search results'''
+        return link in self._index
+
+    def contains_host(self, host):
+        '''Checks if a domain is in the search results'''
+        return host in self._hosts
+
     def __getitem__(self, index):
-        return self._results[index]
-    
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SearchResults index out of range')
+        return self._row(index)
+
+    def __iter__(self):
+        columns = [self._columns[field] for field in self.fields]
+        for row in zip(*columns):
+            yield dict(zip(self.fields, row))
+
+    def __contains__(self, item):
+        values = tuple(item.get(field) for field in self.fields)
+        return any(
+            all(self._columns[field][row] == value for field, value in zip(self.fields, values))
+            for row in self._rows(values[1])
+        )
+
     def __len__(self):
-        return len(self._results)
+        return len(self._columns['link'])
 
     def __str__(self):
-        return '<SearchResults ({} items)>'.format(len(self._results))
-    
+        return '<SearchResults ({} items)>'.format(len(self))
+
     def append(self, item):
         '''appends an item to the results list.'''
-        self._results.append(item)
-    
+        link = item.get('link')
+        host = item.get('host')
+        host = self._hosts.setdefault(host, host)
+        row = len(self)
+        self._columns['host'].append(host)
+        self._columns['link'].append(link)
+        self._columns['title'].append(item.get('title'))
+        self._columns['text'].append(item.get('text'))
+        if self._rows_list is not None:
+            self._rows_list.append(self._row(row))
+
+        rows = self._index.get(link)
+        if rows is None:
+            self._index[link] = row
+        elif isinstance(rows, int):
+            self._index[link] = [rows, row]
+        else:
+            rows.append(row)
+
     def extend(self, items):
         '''appends items to the results list.'''
-        self._results.extend(items)
+        for item in items:
+            self.append(item)
+
+    def _row(self, index):
+        '''Returns a result as a dictionary.'''
+        return {field: self._columns[field][index] for field in self.fields}
+
+    def _rows(self, link):
+        '''Returns the indexes of the results with a link.'''
+        rows = self._index.get(link, ())
+        return (rows,) if isinstance(rows, int) else rows
+
+
+class ColumnView(object):
+    '''A read-only view of a SearchResults column. It doesn't copy the values 
+    and reflects results appended later.
+    '''
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        self._values = values
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        return value in self._values
+
+    def __eq__(self, other):
+        if isinstance(other, ColumnView):
+            other = other._values
+        return self._values == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self._values)
+
+    def index(self, value):
+        return self._values.index(value)
+
+    def count(self, value):
+        return self._values.count(value)
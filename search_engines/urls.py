@@ -0,0 +1,178 @@
+'''URL helpers shared by the engines and the scrapers.
+Parsing is memoized, and registrable domains are found with a public suffix trie.
+The trie is built from a short built-in list of common suffixes, or from the
+full list (https://publicsuffix.org/list/public_suffix_list.dat) if
+config.PUBLIC_SUFFIX_LIST points to a copy of it.
+'''
+import io
+from functools import lru_cache
+from threading import Lock
+from urllib.parse import urlsplit
+
+from . import config as cfg
+
+
+SUFFIXES = u'''
+// generic and country code second-level domains
+ac.uk co.uk gov.uk ltd.uk me.uk net.uk nhs.uk org.uk plc.uk sch.uk
+com.au edu.au gov.au id.au net.au org.au
+ac.jp co.jp ed.jp go.jp gr.jp lg.jp ne.jp or.jp
+ac.nz co.nz geek.nz gen.nz govt.nz net.nz org.nz school.nz
+com.br edu.br gov.br net.br org.br
+com.cn edu.cn gov.cn net.cn org.cn
+ac.in co.in firm.in gen.in gov.in ind.in net.in org.in
+ac.za co.za gov.za net.za org.za web.za
+com.mx edu.mx gob.mx net.mx org.mx
+com.ar edu.ar gob.ar net.ar org.ar
+ac.kr co.kr go.kr ne.kr or.kr re.kr
+com.sg edu.sg gov.sg net.sg org.sg
+com.hk edu.hk gov.hk net.hk org.hk
+com.tw edu.tw gov.tw net.tw org.tw
+com.tr edu.tr gov.tr net.tr org.tr
+co.il org.il ac.il gov.il
+com.pl net.pl org.pl
+co.at or.at
+com.ua kiev.ua
+com.ru
+2000.hu agrar.hu bolt.hu casino.hu city.hu co.hu erotica.hu erotika.hu film.hu forum.hu games.hu hotel.hu
+info.hu ingatlan.hu jogasz.hu konyvelo.hu lakas.hu media.hu news.hu org.hu priv.hu reklam.hu sex.hu shop.hu
+sport.hu suli.hu szex.hu tm.hu tozsde.hu utazas.hu video.hu
+*.ck !www.ck
+// hosting platforms, whose subdomains belong to different owners
+appspot.com blogspot.com cloudfront.net github.io gitlab.io herokuapp.com netlify.app pages.dev
+vercel.app web.app firebaseapp.com azurewebsites.net wordpress.com wixsite.com
+'''
+
+_RULE = ''
+_EXCEPTION = '!'
+
+
+class SuffixTrie(object):
+    '''Public suffix rules, as a trie of labels from the top-level domain down.
+    Supports the list's wildcard (*.ck) and exception (!www.ck) rules.
+    '''
+    def __init__(self, rules=()):
+        self._root = {}
+        for rule in rules:
+            self.add(rule)
+
+    @classmethod
+    def parse(cls, text):
+        '''Creates a trie from text in the public suffix list format.'''
+        rules = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line and not line.startswith('//'):
+                rules.extend(line.split())
+        return cls(rules)
+
+    def add(self, rule):
+        rule = rule.lower()
+        exception = rule.startswith('!')
+        node = self._root
+        for label in reversed(rule.lstrip('!').split('.')):
+            node = node.setdefault(_ascii(label), {})
+        node[_EXCEPTION if exception else _RULE] = True
+
+    def suffix_length(self, labels):
+        '''Returns the number of labels that make up the public suffix of a host's labels.'''
+        exception, length = self._match(self._root, labels[::-1], 0)
+        if exception is not None:
+            return exception
+        return length or 1
+
+    def _match(self, node, labels, depth):
+        '''Returns the length of the matching exception rule (minus a label) and of the longest rule.'''
+        exception, length = None, 0
+        if depth >= len(labels):
+            return exception, length
+        for key in (labels[depth], '*'):
+            child = node.get(key)
+            if child is None:
+                continue
+            if _EXCEPTION in child and key != '*':
+                return depth, length
+            if _RULE in child:
+                length = max(length, depth + 1)
+            child_exception, child_length = self._match(child, labels, depth + 1)
+            if child_exception is not None:
+                return child_exception, length
+            length = max(length, child_length)
+        return exception, length
+
+
+@lru_cache(maxsize=65536)
+def parse(url):
+    '''Splits a URL into its components; results are memoized.'''
+    return urlsplit(url)
+
+@lru_cache(maxsize=65536)
+def host(url, www=False):
+    '''Returns the lowercased host of a URL, without the port.
+    A leading "www." is removed, unless `www` is set.
+    '''
+    try:
+        name = (parse(url).hostname or u'').rstrip('.')
+    except ValueError:
+        return u''
+    if not www and name.startswith(u'www.'):
+        name = name[4:]
+    return name
+
+@lru_cache(maxsize=65536)
+def registrable_domain(url):
+    '''Returns the registrable domain of a URL or a host: its public suffix plus
+    one label, e.g. "example.co.uk" for "https://www.shop.example.co.uk/".
+    IP addresses and hosts that are public suffixes are returned unchanged.
+    '''
+    name = host(url, www=True) if u'//' in url else url.lower().strip(u'.')
+    if not name or _is_ip(name):
+        return name
+    labels = name.split(u'.')
+    length = suffix_trie().suffix_length(labels)
+    if length >= len(labels):
+        return name
+    return u'.'.join(labels[-length - 1:])
+
+def site_root(url):
+    '''Returns the scheme and host (with the port) of a URL, e.g. "https://www.example.com".
+    Returns an empty string for relative URLs.
+    '''
+    parts = parse(url)
+    if not parts.scheme or not parts.netloc:
+        return u''
+    netloc = parts.netloc.rsplit(u'@', 1)[-1].lower()
+    return u'{}://{}'.format(parts.scheme.lower(), netloc)
+
+def suffix_trie():
+    '''Returns the public suffix trie, building it on first use.'''
+    if _trie[0] is None:
+        with _lock:
+            if _trie[0] is None:
+                _trie[0] = SuffixTrie.parse(_suffix_list())
+    return _trie[0]
+
+def _suffix_list():
+    '''Returns the text of config.PUBLIC_SUFFIX_LIST, or the built-in list.'''
+    path = getattr(cfg, 'PUBLIC_SUFFIX_LIST', None)
+    if path:
+        try:
+            with io.open(path, encoding='utf-8') as f:
+                return f.read()
+        except (IOError, OSError):
+            pass
+    return SUFFIXES
+
+def _ascii(label):
+    '''Returns the punycode form of an internationalized label.'''
+    try:
+        return label.encode('idna').decode('ascii') if label not in (u'*', u'') else label
+    except UnicodeError:
+        return label
+
+def _is_ip(name):
+    return u':' in name or name.replace(u'.', u'').isdigit()
+
+
+_trie = [None]
+_lock = Lock()
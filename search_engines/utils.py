@@ -1,13 +1,18 @@
+from functools import lru_cache
+
 import requests
 from .config import PYTHON_VERSION
+from . import urls
 
 
+@lru_cache(maxsize=4096)
 def quote_url(url, safe=';/?:@&=+$,#'):
     '''encodes URLs.'''
     if PYTHON_VERSION == 2:
         url = encode_str(url)
     return requests.utils.quote(url, safe=safe)
 
+@lru_cache(maxsize=4096)
 def unquote_url(url):
     '''decodes URLs.'''
     if PYTHON_VERSION == 2:
@@ -16,13 +21,12 @@ def unquote_url(url):
 
 def is_url(link):
     '''Checks if link is URL'''
-    parts = requests.utils.urlparse(link)
+    parts = urls.parse(link)
     return bool(parts.scheme and parts.netloc)
 
 def domain(url):
-    '''Returns domain form URL'''
-    host = requests.utils.urlparse(url).netloc
-    return host.lower().split(':')[0].replace('www.', '')
+    '''Returns domain form URL, without the port and a leading "www."'''
+    return urls.host(url)
 
 def encode_str(s, encoding='utf-8', errors='replace'):
     '''Encodes unicode to str, str to bytes.'''
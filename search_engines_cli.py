@@ -1,9 +1,11 @@
 # -*- encoding: utf-8 -*-
 import argparse
+import io
+import os
+import sys
 
 try:
     from search_engines.engines import search_engines_dict
-    from search_engines.multiple_search_engines import MultipleSearchEngines, AllSearchEngines
     from search_engines import config
 except ImportError as e:
     msg = '"{}"\nPlease install `search_engines` to resolve this error.'
@@ -23,30 +25,53 @@ def main():
     - Outputs the search results in the specified format.
     
     Usage:
-    -q : Specifies the search query (required).
+    -q : Specifies the search query (required, unless -batch is used).
+    -batch : Specifies a file of queries, one per line, or "-" for stdin. Results are streamed as they arrive.
     -e : Specifies the search engine(s) to use. Can be a comma-separated list or "all". Default is "google".
-    -o : Specifies the output file format ("html", "csv", "json") or "print" (default).
+    -o : Specifies the output file format ("html", "csv", "json", "jsonl") or "print" (default).
     -n : Specifies the filename for the output file. Default is config.OUTPUT_DIR + "output".
     -p : Specifies the number of pages of search results to retrieve. Default is config.SEARCH_ENGINE_RESULTS_PAGES.
     -f : Specifies how to filter search results ("url", "title", "text", "host").
     -i : Flag to ignore duplicate URLs in the search results when using multiple search engines.
-    -proxy : Specifies a proxy server to use for the search requests (format: protocol://ip:port). Default is config.PROXY.
+    -proxy : Specifies a proxy server to use for the search requests (format: protocol://ip:port), or a comma-separated list of proxies to rotate over. Default is config.PROXY.
+    -rotate : Specifies how the requests are spread over multiple proxies ("round-robin", "least-loaded", "sticky"). Default is "round-robin".
+    -stream : Flag to write csv and jsonl rows as results are collected, instead of at the end.
+    -fsync : Flag to sync streamed rows to disk after every write.
+    -workers : Specifies the number of concurrent searches in batch mode. Default is 4.
+    -rate : Specifies an engine's requests per second and burst in batch mode (e.g. google=0.5:2); repeatable.
+    -parse_workers : Specifies the number of processes that parse the result pages in batch mode. Default is 0 (parse in the search threads).
+    -progress : Specifies the batch progress file, used to skip finished searches when a batch is restarted. Default is the -n filename + ".progress".
     """
     
     ap = argparse.ArgumentParser()
-    ap.add_argument('-q', help='query (required)', required=True)
+    query = ap.add_mutually_exclusive_group(required=True)
+    query.add_argument('-q', help='query')
+    query.add_argument('-batch', help='file with a query per line, or - for stdin')
     ap.add_argument('-e', help='search engine(s) - ' + ', '.join(search_engines_dict) + ' (default: "google")', default='google')
-    ap.add_argument('-o', help='output file [html, csv, json] (default: print)', default='print')
+    ap.add_argument('-o', help='output file [html, csv, json, jsonl] (default: print)', default='print')
     ap.add_argument('-n', help='filename for output file', default=config.OUTPUT_DIR+'output')
     ap.add_argument('-p', help='number of pages', default=config.SEARCH_ENGINE_RESULTS_PAGES, type=int)
     ap.add_argument('-f', help='filter results [url, title, text, host]')
     ap.add_argument('-i', help='ignore duplicates, useful when multiple search engines are used', action='store_true')
-    ap.add_argument('-proxy', help='use proxy (protocol://ip:port)', default=config.PROXY)
+    ap.add_argument('-proxy', help='use proxy (protocol://ip:port), or rotate over a comma-separated list', default=config.PROXY)
+    ap.add_argument('-rotate', help='proxy rotation [round-robin, least-loaded, sticky] (default: round-robin)', default='round-robin', choices=['round-robin', 'least-loaded', 'sticky'])
+    ap.add_argument('-stream', help='write csv and jsonl rows as results are collected', action='store_true')
+    ap.add_argument('-fsync', help='sync streamed rows to disk after every write', action='store_true')
+    ap.add_argument('-workers', '--workers', help='concurrent searches in batch mode (default: 4)', default=4, type=int)
+    ap.add_argument('-rate', help='engine requests per second and burst in batch mode, e.g. google=0.5:2', action='append', type=rate_limit, default=[])
+    ap.add_argument('-parse_workers', help='processes that parse the result pages in batch mode (default: 0)', default=0, type=int)
+    ap.add_argument('-progress', help='batch progress file (default: filename.progress)')
     
     args = ap.parse_args()
 
-    proxy = args.proxy
-    timeout = config.TIMEOUT + (10 * bool(proxy))
+    # imported after parsing the arguments, so `-h` doesn't load requests, bs4 etc.
+    from search_engines.multiple_search_engines import MultipleSearchEngines, AllSearchEngines
+    from search_engines import output as out
+    from search_engines.proxies import ProxyPool
+
+    # the pool adds to the timeout of each proxy according to its latency
+    proxy = ProxyPool(args.proxy.split(','), args.rotate) if args.proxy else None
+    timeout = config.TIMEOUT
     engines = [
         e.strip() for e in args.e.lower().split(',') 
         if e.strip() in search_engines_dict or e.strip() == 'all'
@@ -54,6 +79,8 @@ def main():
 
     if not engines:
         print('Please choose a search engine: ' + ', '.join(search_engines_dict))
+    elif args.batch:
+        batch(args, engines, proxy, timeout)
     else:
         if 'all' in engines:
             engine = AllSearchEngines(proxy, timeout)
@@ -66,8 +93,83 @@ def main():
         if args.f:
             engine.set_search_operator(args.f)
         
-        engine.search(args.q, args.p)
-        engine.output(args.o, args.n)
+        if args.stream:
+            engine.sinks = out.open_sinks(args.o, args.n, fsync=args.fsync)
+        try:
+            engine.search(args.q, args.p)
+            engine.output(args.o, args.n)
+        finally:
+            for sink in engine.sinks:
+                sink.close()
+
+def batch(args, engines, proxy, timeout):
+    """
+    Search every query of the -batch file with the selected engines, -workers searches at a time.
+    
+    Results are written to the csv / jsonl files as they are collected (jsonl by default), 
+    and every completed search is added to the progress file. When a killed batch is 
+    restarted, the searches in the progress file are skipped and the output files are 
+    appended to. Searches that were skipped by an open circuit breaker, banned or failed 
+    aren't added, so they run again when the batch is restarted. A search that was interrupted is repeated, so its first rows may be 
+    written twice. Each engine searches a query on its own, so -i ignores the duplicates 
+    of each search.
+    """
+    from search_engines.batch import search_many, Checkpoint, COMPLETED
+    from search_engines.executor import ParseExecutor
+    from search_engines import output as out
+
+    if 'all' in engines:
+        engines = list(search_engines_dict)
+    progress = args.progress or args.n + '.progress'
+    resume = os.path.exists(progress) and os.path.getsize(progress) > 0
+    output = args.o if args.o != 'print' else out.JSONL
+    sinks = out.open_sinks(output, args.n, fsync=args.fsync, mode='a' if resume else 'w')
+    if not sinks:
+        print('Batch mode writes csv or jsonl files, please choose -o csv, jsonl or both')
+        return
+
+    lines = sys.stdin if args.batch == '-' else io.open(args.batch, encoding='utf-8')
+    queries = (q.strip() for q in lines if q.strip())
+    executor = ParseExecutor(args.parse_workers) if args.parse_workers > 0 else None
+    unfinished = {}
+    try:
+        with Checkpoint(progress, fsync=args.fsync) as checkpoint:
+            if len(checkpoint):
+                out.console('Skipping {} finished searches in {}'.format(len(checkpoint), progress))
+            searches = search_many(
+                queries, engines, args.workers, args.p, proxy=proxy, timeout=timeout, 
+                rate_limits=dict(args.rate), sinks=sinks, skip=checkpoint, parse_executor=executor, 
+                search_operator=args.f, ignore_duplicate_urls=args.i
+            )
+            for query, name, results, status in searches:
+                if status == COMPLETED:
+                    checkpoint.add(query, name, len(results))
+                else:
+                    unfinished[status] = unfinished.get(status, 0) + 1
+        if unfinished:
+            counts = ', '.join('{} {}'.format(n, status) for status, n in sorted(unfinished.items()))
+            out.console('Unfinished searches ({}) will run again when the batch is restarted'.format(counts))
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        for sink in sinks:
+            sink.close()
+        if executor is not None:
+            executor.shutdown()
+
+def rate_limit(value):
+    """
+    Parse a -rate value, "engine=requests per second[:burst]", into (engine, (rate, burst)).
+    """
+    try:
+        name, rate = value.lower().split('=')
+        rate, _, burst = rate.partition(':')
+        rate, burst = float(rate), int(burst or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected engine=requests per second[:burst], got "{}"'.format(value))
+    if name not in search_engines_dict:
+        raise argparse.ArgumentTypeError('unknown search engine "{}"'.format(name))
+    return name, (rate, burst)
 
 if __name__ == '__main__':
     """